@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the indicator / engine hot paths, with a regression gate.
+
+Every case runs on synthetic cointegrated ZN/ZF bars (benchmarks/synthetic.py)
+at each requested size, fully offline. Per case and size we record the best
+wall time over --repeat runs, throughput in bars/s, and the tracemalloc peak
+of one extra run (NumPy buffers are traced, Polars' Rust allocations are
+not; the first, compiling call is a separate warm-up and not timed).
+
+    python benchmarks/suite.py run --sizes 1e4,1e5,1e6 --save benchmarks/baselines/local.json
+    python benchmarks/suite.py run --compare benchmarks/baselines/local.json   # exit 1 on regression
+    python benchmarks/suite.py compare old.json new.json --threshold 0.2
+
+A case regresses when its throughput drops by more than --threshold (as a
+fraction) against the baseline at the same size. Baselines are
+machine-specific, so none are committed (benchmarks/baselines/ is
+ignored): record one locally before a change and compare after it. CI
+does the same on one runner, recording the base commit's suite from a
+git worktree and gating the head against it:
+
+    python base/benchmarks/suite.py run --sizes 1e4,1e5 --save /tmp/base.json
+    python benchmarks/suite.py run --sizes 1e4,1e5 --compare /tmp/base.json
+"""
+import argparse, contextlib, io, json, os, pathlib, platform, shutil, sys, tempfile, time, tracemalloc
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+from synthetic import cointegrated, write_raw
+from indicators.kalman import kalman_beta_alpha, kalman_beta_alpha_fast
+from indicators.ewstats import ew_z
+from backtest.engine import PairBacktester, Params
+
+SIZES     = [10**4, 10**5, 10**6]
+THRESHOLD = 0.2
+
+
+# ---- cases ------------------------------------------------------------------
+# setup(n) -> state, fn(state) -> None; max_n skips sizes a slow path can't take,
+# parallel cases get setup(n, workers)
+
+def _market(n):
+    ts, zn, zf = cointegrated(n)
+    beta, alpha = kalman_beta_alpha_fast(zn, zf)
+    z = ew_z(zn - beta*zf - alpha)
+    return dict(a=zn, b=zf, beta=beta, alpha=alpha, z=z, ts=ts)
+
+
+def _spread(n):
+    _, zn, zf = cointegrated(n)
+    return zn - 1.3*zf
+
+
+def _backtester(backend):
+    def setup(n):
+        bt = PairBacktester(*_market(n).values(), Params(cost_per_entry=11.7, cost_per_exit=11.7))
+        bt.backend = backend
+        return bt
+    return setup
+
+
+def _make_bars_setup(n):
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix="bench_bars_"))
+    return dict(tmp=tmp, raw=write_raw(tmp / "raw", n))
+
+
+def _make_bars(state):
+    from preprocessing.make_bars import make_bars
+    with contextlib.redirect_stdout(io.StringIO()):          # per-file progress lines
+        make_bars(state["raw"], state["tmp"] / "out", workers=4, rebuild=True)
+
+
+def _sweep(state):
+    """Signals + the run_backtest entry × exit sweep (metrics only)."""
+    from pipeline.sweep import SharedArrays, parallel_sweep, entry_exit_grid
+    m = state["market"]
+    beta, alpha = kalman_beta_alpha_fast(m["a"], m["b"])
+    z = ew_z(m["a"] - beta*m["b"] - alpha)
+    with SharedArrays(**dict(m, beta=beta, alpha=alpha, z=z)) as shm:
+        parallel_sweep(shm, entry_exit_grid(), workers=state["workers"])
+
+
+CASES = {
+    "kalman_reference": dict(setup=cointegrated, fn=lambda s: kalman_beta_alpha(s[1], s[2]),
+                             max_n=10**5),
+    "kalman_fast":      dict(setup=cointegrated, fn=lambda s: kalman_beta_alpha_fast(s[1], s[2])),
+    "ew_z":             dict(setup=_spread, fn=lambda s: ew_z(s)),
+    "backtest_python":  dict(setup=_backtester("python"), fn=lambda bt: bt.run(), max_n=10**5),
+    "backtest_numba":   dict(setup=_backtester("numba"), fn=lambda bt: bt.run()),
+    "make_bars":        dict(setup=_make_bars_setup, fn=_make_bars, max_n=10**6,
+                             teardown=lambda s: shutil.rmtree(s["tmp"], ignore_errors=True)),
+    "sweep":            dict(setup=lambda n, workers: dict(market=_market(n), workers=workers),
+                             fn=_sweep, parallel=True),
+}
+
+
+# ---- runner -----------------------------------------------------------------
+def measure(case, n, repeat=3, workers=1):
+    spec = CASES[case]
+    state = spec["setup"](n, workers) if spec.get("parallel") else spec["setup"](n)
+    try:
+        spec["fn"](state)                                  # warm-up / JIT compile
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            spec["fn"](state)
+            best = min(best, time.perf_counter() - t0)
+        tracemalloc.start()
+        spec["fn"](state)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        if "teardown" in spec:
+            spec["teardown"](state)
+    return dict(case=case, n=n, seconds=best, bars_per_s=n / best, peak_bytes=peak)
+
+
+def run(cases, sizes, repeat=3, workers=1):
+    rows = []
+    for case in cases:
+        for n in sizes:
+            if n > CASES[case].get("max_n", float("inf")):
+                continue
+            r = measure(case, n, repeat, workers)
+            print(f"{case:18s} n={n:>10,}  {r['seconds']*1e3:10.2f} ms  "
+                  f"{r['bars_per_s']/1e6:9.2f} Mbar/s  peak {r['peak_bytes']/2**20:8.1f} MiB",
+                  flush=True)
+            rows.append(r)
+    return dict(machine=dict(python=platform.python_version(), numpy=np.__version__,
+                             platform=platform.platform(), cpus=os.cpu_count()),
+                created=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                results=rows)
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Regressed rows: throughput below (1 - threshold) × baseline at the same (case, n)."""
+    base = {(r["case"], r["n"]): r for r in baseline["results"]}
+    bad = []
+    for r in current["results"]:
+        b = base.get((r["case"], r["n"]))
+        if b is None:
+            continue
+        ratio = r["bars_per_s"] / b["bars_per_s"]
+        flag = "REGRESSED" if ratio < 1 - threshold else "ok"
+        print(f"{r['case']:18s} n={r['n']:>10,}  {ratio:6.2f}x baseline  {flag}")
+        if ratio < 1 - threshold:
+            bad.append(dict(r, ratio=ratio))
+    return bad
+
+
+def _load(path):
+    return json.loads(pathlib.Path(path).read_text())
+
+
+def main(argv=None):
+    """CLI entry point; returns the process exit code (1 on regression)."""
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run")
+    r.add_argument("--cases", default=",".join(CASES))
+    r.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                   help="comma-separated bar counts, e.g. 1e4,1e5,1e6,1e7")
+    r.add_argument("--repeat", type=int, default=3)
+    r.add_argument("--workers", type=int, default=1, help="processes for the sweep case")
+    r.add_argument("--save", default=None, help="write results JSON here")
+    r.add_argument("--compare", default=None, help="baseline JSON to gate against")
+    r.add_argument("--threshold", type=float, default=THRESHOLD)
+    c = sub.add_parser("compare")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "run":
+        res = run(args.cases.split(","), [int(float(s)) for s in args.sizes.split(",")],
+                  args.repeat, args.workers)
+        if args.save:
+            pathlib.Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+            pathlib.Path(args.save).write_text(json.dumps(res, indent=1))
+            print("saved", args.save)
+        baseline = _load(args.compare) if args.compare else None
+        current = res
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+    if baseline is not None:
+        bad = compare(baseline, current, args.threshold)
+        if bad:
+            print(f"❌  {len(bad)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+        print("✅  no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Synthetic ZN/ZF-like minute data for the benchmarks: ZF is a random walk in
+1/128 ticks, ZN = β·ZF + α + stationary AR(1) noise rounded to 1/64, on a
+minute clock restricted to RTH so the session filters keep every bar.
+Deterministic for a given (n, seed); no network or raw files needed.
+"""
+import pathlib
+import numpy as np
+import polars as pl
+
+BETA, ALPHA = 1.3, -20.0
+RTH_MINUTES = 7 * 60 + 10                     # 13:20–20:30 UTC, inclusive
+
+
+def cointegrated(n, seed=0):
+    """(ts datetime64[ns], zn, zf) with n RTH minute bars."""
+    rng = np.random.default_rng(seed)
+    zf = 110 + np.cumsum(rng.normal(0, 0.01, n))
+    eps = np.empty(n)
+    eps[0] = 0.0
+    shock = rng.normal(0, 0.01, n)
+    for i in range(1, n):                          # AR(1), half-life ~70 bars
+        eps[i] = 0.99 * eps[i-1] + shock[i]
+    zn = BETA * zf + ALPHA + eps
+    zf = np.round(zf * 128) / 128
+    zn = np.round(zn * 64) / 64
+    day, minute = np.divmod(np.arange(n), RTH_MINUTES + 1)
+    ts = (np.datetime64("2015-01-01", "ns") + day * np.timedelta64(1, "D")
+          + np.timedelta64(13 * 60 + 20, "m") + minute * np.timedelta64(1, "m"))
+    return ts, zn, zf
+
+
+def write_raw(out_dir, n, files=4, seed=0):
+    """
+    Databento-like raw files (ts_event, symbol, close; one row per contract
+    per minute) for make_bars, split into `files` consecutive chunks.
+    """
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ts, zn, zf = cointegrated(n, seed)
+    paths = []
+    for j, idx in enumerate(np.array_split(np.arange(n), files)):
+        df = pl.DataFrame({
+            "ts_event": np.concatenate([ts[idx], ts[idx]]),
+            "symbol": ["ZNH5"] * len(idx) + ["ZFH5"] * len(idx),
+            "close": np.concatenate([zn[idx], zf[idx]]),
+        }).with_columns(pl.col("ts_event").dt.replace_time_zone("UTC")).sort("ts_event")
+        path = out_dir / f"ZNZF_{j:03d}.parquet"
+        df.write_parquet(path)
+        paths.append(str(path))
+    return paths
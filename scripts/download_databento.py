@@ -1,71 +1,48 @@
 #!/usr/bin/env python
 """
 Safely download 1-minute OHLCV for ZN + ZF from Databento:
-• Auto-discovers the dataset's last available date
+• Auto-discovers the dataset's last available date and clips the request
 • Adds adjust_continuous only if the SDK version supports it
-• Stops before burning credits on non-existent data
+• Fetches calendar months concurrently (--workers) and streams each one into
+  data/raw/databento/ZNZF_<YYYY-MM>.parquet, one row group per batch
+• Resumable: _manifest.json records finished months, so a rerun only
+  fetches what is missing or changed (e.g. the current, partial month)
+
+The loop lives in src/dbload/fetch.py; this script only reads the config.
+Remove old yearly ZNZF_<YYYY>.parquet files before building bars from the
+monthly ones, or make_bars will see both.
+
+    python scripts/download_databento.py [--workers 4] [--batch 500000]
 """
-import os, yaml, inspect, datetime as dt, pathlib, tqdm, databento as db
+import argparse, os, pathlib, sys, yaml
 from dotenv import load_dotenv
-load_dotenv("config/api_key.env")  # Load API key from .env file
 
-# ---------- config ---------------------------------------------------
-CFG = yaml.safe_load(open("config/databento.yaml"))
-DATASET, SCHEMA   = CFG["dataset"], CFG["schema"]
-SYMS, ADJ         = CFG["symbols"], CFG["adjust"]
-OUTDIR            = pathlib.Path(CFG["out_dir"])
-START_DATE        = dt.datetime.fromisoformat(CFG["start"])
-REQ_END_DATE      = dt.datetime.fromisoformat(CFG["end"])
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+from dbload.fetch import download, BATCH, WORKERS
 
-# ---------- auth -----------------------------------------------------
-API_KEY = os.getenv("DATABENTO_API_KEY")
-if not API_KEY:
-    raise RuntimeError("❌  Set DATABENTO_API_KEY in your env or Codespace secrets")
 
-client = db.Historical(API_KEY)
-client.set_limits(max_bytes=120_000_000)  # 120 MB cap
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--config", default="config/databento.yaml")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--batch", type=int, default=BATCH)
+    args = ap.parse_args(argv)
 
-# ---------- discover real dataset end date ---------------------------
-meta = client.metadata.get_dataset_range(dataset=DATASET)
-DATASET_END = dt.datetime.fromisoformat(meta["end"])
-if DATASET_END < REQ_END_DATE:
-    print(f"ℹ️  {DATASET} currently ends {DATASET_END:%Y-%m-%d}. "
-          f"Clipping requests after that date.")
-FINAL_END = min(REQ_END_DATE, DATASET_END)
+    load_dotenv("config/api_key.env")  # Load API key from .env file
+    cfg = yaml.safe_load(open(args.config))
 
-# ---------- helper ---------------------------------------------------
-HAS_ADJUST = "adjust_continuous" in inspect.signature(
-                 client.timeseries.get_range).parameters
-print(f"SDK adjust_continuous support: {HAS_ADJUST}")
+    # ---------- auth -------------------------------------------------
+    api_key = os.getenv("DATABENTO_API_KEY")
+    if not api_key:
+        raise RuntimeError("❌  Set DATABENTO_API_KEY in your env or Codespace secrets")
+    import databento as db
+    client = db.Historical(api_key)
 
-def fetch_year(year):
-    start = dt.datetime(year, 1, 2)
-    end   = dt.datetime(year, 12, 31, 23, 59)
-    if end < START_DATE or start > FINAL_END:
-        return                                  # outside desired range
-    if end > FINAL_END:
-        end = FINAL_END                         # clip last partial year
-    kwargs = dict(
-        dataset = DATASET,
-        schema  = SCHEMA,
-        symbols = SYMS,
-        stype_in= "parent",
-        start   = start.isoformat(),
-        end     = end.isoformat(),
-        encoding="dbn",
-    )
-    if "adjust_continuous" in inspect.signature(client.timeseries.get_range).parameters:
-        KWARGS["adjust_continuous"] = ADJ
-    print(f"→ {year}: {kwargs['start']} → {kwargs['end']}")
-    frame = client.timeseries.get_range(**kwargs)
-    path  = OUTDIR / f"ZNZF_{year}.parquet"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    frame.to_df().to_parquet(path)
-    print(f"   saved {path.name:14} "
-          f"({path.stat().st_size/1e6:,.1f} MB)")
+    fetched = download(client, cfg["start"], cfg["end"], cfg["out_dir"],
+                       dataset=cfg["dataset"], schema=cfg["schema"], symbols=cfg["symbols"],
+                       adjust=cfg.get("adjust"), workers=args.workers, batch=args.batch)
+    print(f"✅  download complete ({len(fetched)} month(s) fetched)")
 
-# ---------- loop -----------------------------------------------------
-for yr in tqdm.tqdm(range(START_DATE.year, FINAL_END.year + 1)):
-    fetch_year(yr)
 
-print("✅  download complete")
+if __name__ == "__main__":
+    main()
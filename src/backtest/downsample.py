@@ -0,0 +1,121 @@
+"""
+Downsampling of long equity series before plotting.
+
+A 1 650-px-wide figure can't show more than a few thousand distinct x
+positions, so drawing 2M minute bars only costs time (and, in Plotly HTML,
+megabytes). Two reducers, both returning indices into the original arrays
+so x and y stay paired and the first/last points are always kept:
+
+• minmax_indices – envelope: first, min, max and last point of each of
+  `buckets` equal-width x buckets, in time order. Every extreme survives,
+  so the rasterized line matches the full series at display resolution.
+• lttb_indices – Largest-Triangle-Three-Buckets: `n_out` points chosen to
+  keep the visual shape; smoother, but may skip single-bar spikes.
+"""
+import numpy as np
+from utils.jit import njit
+
+PLOT_BUCKETS = 2_000             # ≥ figure width in pixels at savefig dpi
+
+
+def to_datetime64(dt):
+    """UTC datetime64[ns] ndarray from datetime64 arrays, DatetimeIndex (tz or not) or lists."""
+    if isinstance(dt, np.ndarray) and np.issubdtype(dt.dtype, np.datetime64):
+        return dt.astype("datetime64[ns]", copy=False)
+    import pandas as pd
+    idx = pd.DatetimeIndex(dt)
+    if idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    return idx.values.astype("datetime64[ns]", copy=False)
+
+
+def as_float_x(x):
+    """datetime64 / int / float x as float64 for bucketing (no Python datetimes)."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").view(np.int64).astype(float)
+    return x.astype(float)
+
+
+def minmax_indices(x, y, buckets=PLOT_BUCKETS):
+    """Sorted indices of the first/min/max/last point per x bucket (≤ 4·buckets)."""
+    n = len(y)
+    if n <= 4 * buckets:
+        return np.arange(n)
+    xf = as_float_x(x)
+    edges = np.linspace(xf[0], xf[-1], buckets + 1)
+    starts = np.unique(np.searchsorted(xf, edges[:-1], side="left"))
+    ends = np.append(starts[1:], n) - 1
+    y = np.asarray(y, dtype=float)
+    # NaNs would poison reduceat; they're rare in an equity curve, treat as -inf/+inf
+    lo = np.minimum.reduceat(np.where(np.isnan(y), np.inf, y), starts)
+    hi = np.maximum.reduceat(np.where(np.isnan(y), -np.inf, y), starts)
+    imin = _first_match(y, starts, ends, lo)
+    imax = _first_match(y, starts, ends, hi)
+    return np.unique(np.concatenate([starts, ends, imin, imax]))
+
+
+@njit(cache=True)
+def _first_match(y, starts, ends, target):
+    out = starts.copy()
+    for j in range(starts.shape[0]):
+        for i in range(starts[j], ends[j] + 1):
+            if y[i] == target[j]:
+                out[j] = i
+                break
+    return out
+
+
+@njit(cache=True)
+def _lttb(x, y, n_out):
+    n = x.shape[0]
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for j in range(n_out - 2):
+        lo = int(j * every) + 1
+        hi = int((j + 1) * every) + 1
+        nlo = hi
+        nhi = min(int((j + 2) * every) + 1, n)
+        ax = 0.0; ay = 0.0
+        for k in range(nlo, nhi):
+            ax += x[k]; ay += y[k]
+        cnt = nhi - nlo
+        if cnt > 0:
+            ax /= cnt; ay /= cnt
+        else:
+            ax = x[n-1]; ay = y[n-1]
+        best = -1.0
+        pick = lo
+        for k in range(lo, hi):
+            area = abs((x[a] - ax) * (y[k] - y[a]) - (x[a] - x[k]) * (ay - y[a]))
+            if area > best:
+                best = area
+                pick = k
+        out[j + 1] = pick
+        a = pick
+    out[n_out - 1] = n - 1
+    return out
+
+
+def lttb_indices(x, y, n_out=4 * PLOT_BUCKETS):
+    """Indices of the n_out points picked by Largest-Triangle-Three-Buckets."""
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    xf = as_float_x(x)
+    return _lttb(xf - xf[0], np.nan_to_num(np.asarray(y, dtype=float)), n_out)
+
+
+def downsample(x, y, method="minmax", buckets=PLOT_BUCKETS):
+    """(x, y) reduced with minmax_indices or lttb_indices (4·buckets points)."""
+    if method == "minmax":
+        idx = minmax_indices(x, y, buckets)
+    elif method == "lttb":
+        idx = lttb_indices(x, y, 4 * buckets)
+    elif method is None:
+        return np.asarray(x), np.asarray(y)
+    else:
+        raise ValueError(f"unknown downsample method {method!r}")
+    return np.asarray(x)[idx], np.asarray(y)[idx]
@@ -2,6 +2,9 @@
 # ...implementation placeholder...
 import numpy as np
 from dataclasses import dataclass
+from utils.jit import njit, HAVE_NUMBA
+from backtest.metrics import (_acc_bar, metrics_init, metrics_from_arrays,
+                              metrics_summary, ACC_SIZE, DAY_NS)
 
 # === Contract economics (points → $) =========================================
 POINT_VALUE_USD = 1000.0         # keep if you still need it elsewhere
@@ -21,12 +24,196 @@ class Params:
     cost_per_entry: float = 0.0          # $ per spread entry
     cost_per_exit:  float = 0.0          # $ per spread exit
 
+@njit(cache=True)
+def _pair_loop(a, b, beta, z, day, entry_z, exit_z, stop_z, time_stop_bars,
+               budget_usd, cost_per_entry, cost_per_exit, pnl, posA, posB, acc,
+               trades):
+    """
+    nopython PairBacktester.run: contiguous float64 inputs, Params as scalars,
+    results written into the preallocated pnl/posA/posB buffers. Zero-length
+    buffers skip storing; a non-empty `acc` (metrics_init()) is updated every
+    bar with day[i] as the calendar day; a non-empty `trades` (cap, TRADE_COLS)
+    receives one row per trade. Returns the number of trades (rows beyond
+    `cap` are counted but not written).
+    """
+    n = a.shape[0]
+    store = pnl.shape[0] > 0
+    track = acc.shape[0] > 0
+    record = trades.shape[1] > 0
+    cap = trades.shape[0]
+    k = 0
+    ent_i = 0; ent_eq = 0.0
+    in_pos = False
+    qA = 0; qB = 0
+    age = 0
+    eq = 0.0
+    lastA = 0; lastB = 0
+    if store:
+        pnl[0] = 0.0; posA[0] = 0; posB[0] = 0
+    for i in range(1, n):
+        prev_eq = eq
+        heldA = qA; heldB = qB
+        da = a[i] - a[i-1]
+        db = b[i] - b[i-1]
+        if in_pos and (abs(da) <= MAX_POINT_JUMP) and (abs(db) <= MAX_POINT_JUMP):
+            tick_a = da / TICK_ZN
+            tick_b = db / TICK_ZF
+            eq = eq + qA * tick_a * TICKVAL_ZN + qB * tick_b * TICKVAL_ZF
+            age += 1
+
+        if store:
+            posA[i] = qA; posB[i] = qB
+
+        z_now = z[i]
+        if in_pos:
+            if (np.isnan(z_now) or abs(z_now) < exit_z
+                    or abs(z_now) > stop_z or age >= time_stop_bars):
+                in_pos = False
+                eq -= cost_per_exit
+                if record:
+                    if k < cap:
+                        _write_trade(trades[k], a, b, ent_i, i, qA, qB,
+                                     cost_per_entry, cost_per_exit, eq - ent_eq)
+                    k += 1
+                qA = 0; qB = 0
+                age = 0
+
+        if (not in_pos) and (not np.isnan(z_now)) and abs(z_now) > entry_z:
+            sgn = -1 if z_now > 0 else 1
+            # PairBacktester._size with qA = sgn, qB = -β·sgn
+            notional = a[i]*POINT_VALUE_USD + abs(beta[i])*b[i]*POINT_VALUE_USD
+            scale = max(1.0, budget_usd / notional)
+            qA = sgn * max(1, int(np.rint(scale)))
+            qB = int(np.sign(-beta[i] * sgn)) * max(1, int(np.rint(abs(beta[i]) * scale)))
+            in_pos = True
+            ent_i = i; ent_eq = eq
+            eq -= cost_per_entry
+
+        if store:
+            pnl[i] = eq
+        if track:
+            # turnover as in metrics.turnover: the held position (posA[i]) changed
+            _acc_bar(acc, prev_eq, eq, heldA != lastA or heldB != lastB, day[i])
+        lastA = heldA; lastB = heldB
+
+    if record and in_pos:                       # still open: marked at the last bar
+        if k < cap:
+            _write_trade(trades[k], a, b, ent_i, -1, qA, qB,
+                         cost_per_entry, 0.0, eq - ent_eq)
+        k += 1
+    return k
+
+
+# trade ledger columns (kernel side is a float64 matrix, see LEDGER_DTYPE)
+TRADE_COLS = 11
+LEDGER_DTYPE = np.dtype([
+    ("entry_idx", "i8"), ("exit_idx", "i8"),      # exit_idx = -1 → open at the end
+    ("qA", "i8"), ("qB", "i8"),
+    ("entry_a", "f8"), ("entry_b", "f8"), ("exit_a", "f8"), ("exit_b", "f8"),
+    ("entry_cost", "f8"), ("exit_cost", "f8"), ("pnl", "f8"),   # pnl net of costs
+])
+
+@njit(cache=True)
+def _write_trade(row, a, b, ent_i, ex_i, qA, qB, cost_entry, cost_exit, pnl):
+    j = ex_i if ex_i >= 0 else a.shape[0] - 1
+    row[0] = ent_i; row[1] = ex_i; row[2] = qA; row[3] = qB
+    row[4] = a[ent_i]; row[5] = b[ent_i]; row[6] = a[j]; row[7] = b[j]
+    row[8] = cost_entry; row[9] = cost_exit; row[10] = pnl
+
+
+@njit(cache=True)
+def _ledger_dense(a, b, entry_idx, exit_idx, qAs, qBs, entry_cost, exit_cost,
+                  pnl, posA, posB):
+    """Replay a ledger into dense pnl/posA/posB with the engine's arithmetic."""
+    n = a.shape[0]
+    eq = 0.0
+    t = 0
+    in_pos = False
+    qA = 0; qB = 0
+    pnl[0] = 0.0; posA[0] = 0; posB[0] = 0
+    for i in range(1, n):
+        da = a[i] - a[i-1]
+        db = b[i] - b[i-1]
+        if in_pos and (abs(da) <= MAX_POINT_JUMP) and (abs(db) <= MAX_POINT_JUMP):
+            tick_a = da / TICK_ZN
+            tick_b = db / TICK_ZF
+            eq = eq + qA * tick_a * TICKVAL_ZN + qB * tick_b * TICKVAL_ZF
+        posA[i] = qA; posB[i] = qB
+        if in_pos and exit_idx[t] == i:
+            eq -= exit_cost[t]
+            in_pos = False
+            qA = 0; qB = 0
+            t += 1
+        if (not in_pos) and t < entry_idx.shape[0] and entry_idx[t] == i:
+            in_pos = True
+            qA = qAs[t]; qB = qBs[t]
+            eq -= entry_cost[t]
+        pnl[i] = eq
+
+
+def _ledger_records(rows):
+    out = np.empty(len(rows), dtype=LEDGER_DTYPE)
+    for j, name in enumerate(LEDGER_DTYPE.names):
+        out[name] = rows[:, j]
+    return out
+
+
+class TradeLedger:
+    """
+    Sparse backtest result: one LEDGER_DTYPE row per trade plus references
+    (not copies) to the price arrays, from which the dense equity curve and
+    positions are rebuilt on demand, bit-identical to PairBacktester.run().
+    """
+    def __init__(self, trades, a, b):
+        self.trades = trades
+        self.a = a
+        self.b = b
+        self.metrics = None
+
+    def __len__(self):
+        return len(self.trades)
+
+    @property
+    def nbytes(self):
+        return self.trades.nbytes
+
+    def to_dense(self):
+        n = len(self.a)
+        pnl  = np.empty(n)
+        posA = np.empty(n, dtype=np.int64)
+        posB = np.empty(n, dtype=np.int64)
+        if n:
+            t = self.trades
+            _ledger_dense(np.ascontiguousarray(self.a), np.ascontiguousarray(self.b),
+                          t["entry_idx"].copy(), t["exit_idx"].copy(),
+                          t["qA"].copy(), t["qB"].copy(),
+                          t["entry_cost"].copy(), t["exit_cost"].copy(), pnl, posA, posB)
+        return {"pnl": pnl, "posA": posA, "posB": posB}
+
+    def equity(self):
+        """Dense cumulative PnL, rebuilt from the ledger."""
+        return self.to_dense()["pnl"]
+
+
+def _days(ts, n):
+    """Integer UTC day number per bar (all zeros when ts is missing)."""
+    if ts is None or len(ts) != n:
+        return np.zeros(n, dtype=np.int64)
+    return np.asarray(ts, dtype="datetime64[ns]").view(np.int64) // DAY_NS
+
+
 class PairBacktester:
     """
     Trade ZN vs ZF using spread = a - β b - α.
     At entry we fix quantities (qA, qB) from β_t and scale to 'budget_usd'.
     PnL in dollars: qA*Δa*1000 + qB*Δb*1000.
+
+    `backend` selects the execution path: "python" is the reference per-bar
+    loop below, "numba" runs the same rules in the compiled `_pair_loop`.
+    Set it on the class (PairBacktester.backend = "numba") or per instance.
     """
+    backend = "python"
+
     def __init__(self, a, b, beta, alpha, z, ts, params: Params):
         self.a = a.astype(float)
         self.b = b.astype(float)
@@ -54,7 +241,29 @@ class PairBacktester:
         qB = int(np.sign(qB) * max(1, int(round(abs(qB) * scale))))
         return qA, qB
 
-    def run(self):
+    def run(self, metrics=False):
+        """
+        Dense pnl/posA/posB arrays. With metrics=True the result also has a
+        "metrics" summary (see backtest.metrics.metrics_summary).
+        """
+        if self.backend == "numba":
+            return self._run_compiled(store=True, metrics=metrics)
+        if self.backend != "python":
+            raise ValueError(f"unknown backend {self.backend!r}")
+        out = self._run_reference()
+        if metrics:
+            out["metrics"] = metrics_summary(metrics_from_arrays(
+                out["pnl"], out["posA"], out["posB"], _days(self.ts, len(self.a))))
+        return out
+
+    def run_metrics(self):
+        """
+        Metrics summary only, accumulated inside the compiled loop: no
+        length-n pnl/position arrays are allocated.
+        """
+        return self._run_compiled(store=False, metrics=True)["metrics"]
+
+    def _run_reference(self):
         n = len(self.a)
         pnl  = np.zeros(n)
         posA = np.zeros(n, dtype=int)
@@ -97,3 +306,237 @@ class PairBacktester:
                 pnl[i] -= self.p.cost_per_entry
 
         return {"pnl": pnl, "posA": posA, "posB": posB}
+
+    def run_ledger(self, metrics=False):
+        """
+        Compact result: a TradeLedger (one row per trade) instead of dense
+        arrays; ledger.to_dense() rebuilds pnl/posA/posB exactly. Always uses
+        the compiled loop. With metrics=True the summary is in ledger.metrics.
+        """
+        out = self._run_compiled(store=False, metrics=metrics, ledger=True)
+        led = TradeLedger(out["trades"], self.a, self.b)
+        led.metrics = out.get("metrics")
+        return led
+
+    def _run_compiled(self, store=True, metrics=False, ledger=False):
+        n = len(self.a)
+        m = n if store else 0
+        pnl  = np.empty(m)
+        posA = np.empty(m, dtype=np.int64)
+        posB = np.empty(m, dtype=np.int64)
+        day  = _days(self.ts, n) if metrics else np.empty(0, dtype=np.int64)
+        cap  = max(64, n // 256) if ledger else 0
+        while True:
+            acc    = metrics_init() if metrics else np.empty(0)
+            trades = np.empty((cap, TRADE_COLS) if ledger else (0, 0))
+            k = 0
+            if n:
+                p = self.p
+                k = _pair_loop(*(np.ascontiguousarray(x) for x in (self.a, self.b, self.beta, self.z)),
+                               day, float(p.entry_z), float(p.exit_z), float(p.stop_z),
+                               float(p.time_stop_bars), float(p.budget_usd),
+                               float(p.cost_per_entry), float(p.cost_per_exit),
+                               pnl, posA, posB, acc, trades)
+            if k <= cap:
+                break
+            cap = k                             # rare: more trades than guessed, rerun exact
+        out = {"pnl": pnl, "posA": posA, "posB": posB} if store else {}
+        if ledger:
+            out["trades"] = _ledger_records(trades[:k])
+        if metrics:
+            out["metrics"] = metrics_summary(acc)
+        return out
+
+
+@njit(cache=True)
+def _grid_loop(a, b, beta, z, day, entry_z, exit_z, stop_z, time_stop_bars,
+               budget_usd, cost_per_entry, cost_per_exit, pnl, posA, posB, acc):
+    """
+    Compiled PairGridBacktester.run: bars outer, parameter sets inner.
+    (n, G) buffers are filled unless empty (posA/posB may be empty on their
+    own); acc rows (G, ACC_SIZE) are updated per bar unless empty, as in
+    `_pair_loop`.
+    """
+    n, G = a.shape[0], entry_z.shape[0]
+    store = pnl.shape[0] > 0
+    keep_pos = posA.shape[0] > 0
+    track = acc.shape[0] > 0
+    in_pos = np.zeros(G, dtype=np.bool_)
+    qA = np.zeros(G); qB = np.zeros(G)
+    lastA = np.zeros(G); lastB = np.zeros(G)
+    age = np.zeros(G)
+    eq = np.zeros(G)
+    for i in range(1, n):
+        da = a[i] - a[i-1]
+        db = b[i] - b[i-1]
+        ok = (abs(da) <= MAX_POINT_JUMP) and (abs(db) <= MAX_POINT_JUMP)
+        tick_a = da / TICK_ZN
+        tick_b = db / TICK_ZF
+        z_now = z[i]
+        nan_z = np.isnan(z_now)
+        az = abs(z_now)
+        sgn = -1.0 if z_now > 0 else 1.0
+        notional = a[i]*POINT_VALUE_USD + abs(beta[i])*b[i]*POINT_VALUE_USD
+        for g in range(G):
+            prev = eq[g]
+            cur = prev
+            heldA = qA[g]; heldB = qB[g]
+            if in_pos[g] and ok:
+                cur = cur + qA[g] * tick_a * TICKVAL_ZN + qB[g] * tick_b * TICKVAL_ZF
+                age[g] += 1
+            if keep_pos:
+                posA[i, g] = int(qA[g]); posB[i, g] = int(qB[g])
+
+            if in_pos[g]:
+                if (nan_z or az < exit_z[g] or az > stop_z[g]
+                        or age[g] >= time_stop_bars[g]):
+                    in_pos[g] = False
+                    cur -= cost_per_exit[g]
+                    qA[g] = 0.0; qB[g] = 0.0
+                    age[g] = 0.0
+
+            if (not in_pos[g]) and (not nan_z) and az > entry_z[g]:
+                scale = max(1.0, budget_usd[g] / notional)
+                qA[g] = sgn * max(1.0, np.rint(scale))
+                qB[g] = np.sign(-beta[i] * sgn) * max(1.0, np.rint(abs(beta[i]) * scale))
+                in_pos[g] = True
+                cur -= cost_per_entry[g]
+            eq[g] = cur
+            if store:
+                pnl[i, g] = cur
+            if track:
+                _acc_bar(acc[g], prev, cur, heldA != lastA[g] or heldB != lastB[g], day[i])
+                lastA[g] = heldA; lastB[g] = heldB
+
+
+class PairGridBacktester:
+    """
+    Same strategy as PairBacktester, but for G parameter sets at once.
+    entry_z / exit_z / stop_z / time_stop_bars (and optionally budget_usd and
+    the costs) are arrays broadcast to (G,); every bar steps all G state
+    machines together (compiled loop over G with numba, vectorized NumPy
+    otherwise). Row g of the outputs equals
+    PairBacktester(..., Params(entry_z[g], ...)).run().
+    """
+    def __init__(self, a, b, beta, alpha, z, ts, entry_z, exit_z, stop_z,
+                 time_stop_bars, budget_usd=250_000.0,
+                 cost_per_entry=0.0, cost_per_exit=0.0):
+        self.a = a.astype(float)
+        self.b = b.astype(float)
+        self.beta  = beta.astype(float)
+        self.alpha = alpha.astype(float)
+        self.z = z.astype(float)
+        self.ts = ts
+        (self.entry_z, self.exit_z, self.stop_z, self.time_stop_bars,
+         self.budget_usd, self.cost_per_entry, self.cost_per_exit) = (
+            np.array(v, dtype=float) for v in np.broadcast_arrays(
+                entry_z, exit_z, stop_z, time_stop_bars,
+                budget_usd, cost_per_entry, cost_per_exit))
+        if self.entry_z.ndim != 1:
+            raise ValueError("grid parameters must broadcast to a 1-D array")
+
+    @classmethod
+    def from_params(cls, a, b, beta, alpha, z, ts, params):
+        """Build the grid from a sequence of Params."""
+        cols = {f: [getattr(p, f) for p in params]
+                for f in ("entry_z", "exit_z", "stop_z", "time_stop_bars",
+                          "budget_usd", "cost_per_entry", "cost_per_exit")}
+        return cls(a, b, beta, alpha, z, ts, **cols)
+
+    def _size(self, i, sign):
+        """Vector of (qA, qB) for every parameter set; mirrors PairBacktester._size."""
+        pa, pb, beta = self.a[i], self.b[i], self.beta[i]
+        notional = pa*POINT_VALUE_USD + abs(beta)*pb*POINT_VALUE_USD
+        scale = np.maximum(1.0, self.budget_usd / notional)
+        qA = sign * np.maximum(1.0, np.rint(scale))
+        qB = np.sign(-beta * sign) * np.maximum(1.0, np.rint(abs(beta) * scale))
+        return qA, qB
+
+    def run(self):
+        n, G = len(self.a), len(self.entry_z)
+        # filled bar-major so each step writes one contiguous row
+        pnl  = np.zeros((n, G))
+        posA = np.zeros((n, G), dtype=int)
+        posB = np.zeros((n, G), dtype=int)
+
+        if HAVE_NUMBA:
+            self._run_compiled(pnl, posA, posB, np.empty((0, ACC_SIZE)))
+            return {"pnl": pnl.T, "posA": posA.T, "posB": posB.T}
+
+        in_pos = np.zeros(G, dtype=bool)
+        qA = np.zeros(G); qB = np.zeros(G)
+        age = np.zeros(G)
+        min_entry = self.entry_z.min() if G else np.inf
+
+        for i in range(1, n):
+            da = self.a[i] - self.a[i-1]
+            db = self.b[i] - self.b[i-1]
+
+            # flat sets carry q = 0, so adding their (zero) PnL leaves them unchanged
+            if (abs(da) <= MAX_POINT_JUMP) and (abs(db) <= MAX_POINT_JUMP):
+                tick_a = da / TICK_ZN
+                tick_b = db / TICK_ZF
+                pnl[i] = pnl[i-1] + qA * tick_a * TICKVAL_ZN + qB * tick_b * TICKVAL_ZF
+                age += in_pos
+            else:
+                pnl[i] = pnl[i-1]
+
+            posA[i], posB[i] = qA, qB
+
+            z_now = self.z[i]
+            if np.isnan(z_now):
+                ext = in_pos
+            else:
+                az = abs(z_now)
+                ext = in_pos & ((az < self.exit_z) | (az > self.stop_z)
+                                | (age >= self.time_stop_bars))
+            if ext.any():
+                pnl[i, ext] -= self.cost_per_exit[ext]
+                in_pos = in_pos & ~ext
+                qA[ext] = qB[ext] = age[ext] = 0
+
+            if (not np.isnan(z_now)) and abs(z_now) > min_entry:
+                ent = ~in_pos & (abs(z_now) > self.entry_z)
+                if ent.any():
+                    sA, sB = self._size(i, -int(np.sign(z_now)))
+                    qA[ent], qB[ent] = sA[ent], sB[ent]
+                    in_pos = in_pos | ent
+                    pnl[i, ent] -= self.cost_per_entry[ent]
+
+        return {"pnl": pnl.T, "posA": posA.T, "posB": posB.T}
+
+    def equity(self):
+        """
+        (G, n) cumulative PnL only, as run()["pnl"], without the position
+        buffers (a third of the memory; used by backtest.significance).
+        """
+        if not HAVE_NUMBA:
+            return self.run()["pnl"]
+        n, G = len(self.a), len(self.entry_z)
+        pnl = np.zeros((n, G))
+        none = np.empty((0, G), dtype=np.int64)
+        self._run_compiled(pnl, none, none, np.empty((0, ACC_SIZE)))
+        return pnl.T
+
+    def run_metrics(self):
+        """
+        One metrics summary per parameter set (see metrics_summary), with the
+        accumulators updated inside the loop: memory is O(G), not O(G·n).
+        """
+        G = len(self.entry_z)
+        if not HAVE_NUMBA:
+            out, day = self.run(), _days(self.ts, len(self.a))
+            return [metrics_summary(metrics_from_arrays(out["pnl"][g], out["posA"][g],
+                                                        out["posB"][g], day))
+                    for g in range(G)]
+        acc = np.tile(metrics_init(), (G, 1))
+        empty = np.empty((0, G))
+        self._run_compiled(empty, empty.astype(np.int64), empty.astype(np.int64), acc)
+        return [metrics_summary(row) for row in acc]
+
+    def _run_compiled(self, pnl, posA, posB, acc):
+        day = _days(self.ts, len(self.a)) if len(acc) else np.empty(0, dtype=np.int64)
+        _grid_loop(self.a, self.b, self.beta, self.z, day,
+                   self.entry_z, self.exit_z, self.stop_z, self.time_stop_bars,
+                   self.budget_usd, self.cost_per_entry, self.cost_per_exit,
+                   pnl, posA, posB, acc)
@@ -1,6 +1,7 @@
 # Backtest metrics
 # ...implementation placeholder...
 import numpy as np
+from utils.jit import njit
 
 def sharpe(ret, scale=252*6.5*12):
     m = np.nanmean(ret); s = np.nanstd(ret)
@@ -14,3 +15,98 @@ def drawdown(equity):
 def turnover(posA, posB):
     trades = np.sum((np.abs(np.diff(posA)) + np.abs(np.diff(posB))) > 0)
     return trades
+
+
+# === Streaming accumulator ===================================================
+# One float64 vector per backtest, updated bar by bar from inside the engine
+# loops (so sweeps need no pnl/pos arrays): Welford mean/var of bar PnL,
+# running peak/drawdown, trade count and calendar-day PnL buckets. Empty
+# days between two traded days count as 0 in the daily min/mean/max, like
+# Series.resample("D").sum(); the daily Sharpe only sees days with bars, so
+# weekends and holidays don't dilute its sqrt(252) annualization.
+(_N, _MEAN, _M2, _PEAK, _MDD, _TRADES, _LAST, _STARTED, _DAY, _DSUM,
+ _DN, _DMEAN, _DM2, _DMIN, _DMAX, _BN, _BMEAN, _BM2) = range(18)
+ACC_SIZE = 18
+DAY_NS   = 86_400_000_000_000
+
+def metrics_init():
+    acc = np.zeros(ACC_SIZE)
+    acc[_DMIN], acc[_DMAX] = np.inf, -np.inf
+    return acc
+
+@njit(cache=True)
+def _acc_day(acc, x):
+    acc[_DN] += 1
+    d = x - acc[_DMEAN]
+    acc[_DMEAN] += d / acc[_DN]
+    acc[_DM2] += d * (x - acc[_DMEAN])
+    acc[_DMIN] = min(acc[_DMIN], x)
+    acc[_DMAX] = max(acc[_DMAX], x)
+
+@njit(cache=True)
+def _acc_bar_day(acc, x):
+    """Close a day that had bars: calendar stats plus the bar-day Welford."""
+    _acc_day(acc, x)
+    acc[_BN] += 1
+    d = x - acc[_BMEAN]
+    acc[_BMEAN] += d / acc[_BN]
+    acc[_BM2] += d * (x - acc[_BMEAN])
+
+@njit(cache=True)
+def _acc_bar(acc, pnl_prev, pnl_now, traded, day):
+    """Fold bar (pnl_prev → pnl_now) into `acc`; `day` is an integer day number."""
+    r = pnl_now - pnl_prev
+    acc[_N] += 1
+    d = r - acc[_MEAN]
+    acc[_MEAN] += d / acc[_N]
+    acc[_M2] += d * (r - acc[_MEAN])
+    if pnl_now > acc[_PEAK]:
+        acc[_PEAK] = pnl_now
+    acc[_MDD] = min(acc[_MDD], pnl_now - acc[_PEAK])
+    if traded:
+        acc[_TRADES] += 1
+    acc[_LAST] = pnl_now
+    if acc[_STARTED] == 0:
+        acc[_STARTED] = 1
+        acc[_DAY] = day
+    elif day != acc[_DAY]:
+        _acc_bar_day(acc, acc[_DSUM])
+        for _ in range(int(day - acc[_DAY]) - 1):
+            _acc_day(acc, 0.0)
+        acc[_DAY] = day
+        acc[_DSUM] = 0.0
+    acc[_DSUM] += r
+
+@njit(cache=True)
+def _acc_arrays(acc, pnl, posA, posB, day):
+    for i in range(1, pnl.shape[0]):
+        traded = posA[i] != posA[i-1] or posB[i] != posB[i-1]
+        _acc_bar(acc, pnl[i-1], pnl[i], traded, day[i])
+
+def metrics_from_arrays(pnl, posA, posB, day):
+    """Accumulator state for finished arrays (same numbers as the in-loop path)."""
+    acc = metrics_init()
+    _acc_arrays(acc, np.asarray(pnl, dtype=float), np.asarray(posA), np.asarray(posB),
+                np.asarray(day, dtype=np.int64))
+    return acc
+
+def metrics_summary(acc, scale=252*6.5*12):
+    """
+    Sharpe (as `sharpe`), max drawdown (as `drawdown`), turnover (as
+    `turnover`), final PnL and daily PnL stats from an accumulator. The
+    daily Sharpe is over days with bars only, annualized with sqrt(252).
+    """
+    acc = np.array(acc, dtype=float)
+    if acc[_STARTED]:
+        _acc_bar_day(acc, acc[_DSUM])                   # close the open day
+    s  = np.sqrt(acc[_M2] / acc[_N]) if acc[_N] else 0.0
+    ds = np.sqrt(acc[_BM2] / acc[_BN]) if acc[_BN] else 0.0
+    return dict(sharpe=float(acc[_MEAN] / s * np.sqrt(scale)) if s > 0 else 0.0,
+                max_dd=float(acc[_MDD]),
+                turnover=int(acc[_TRADES]),
+                pnl=float(acc[_LAST]),
+                n_days=int(acc[_DN]),
+                daily_min=float(acc[_DMIN]) if acc[_DN] else 0.0,
+                daily_mean=float(acc[_DMEAN]),
+                daily_max=float(acc[_DMAX]) if acc[_DN] else 0.0,
+                daily_sharpe=float(acc[_BMEAN] / ds * np.sqrt(252)) if ds > 0 else 0.0)
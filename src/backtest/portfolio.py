@@ -0,0 +1,264 @@
+"""
+Portfolio of pair trades across the Treasury curve on one time axis.
+
+Leg prices live in one (n, C) array with a column per contract root; each
+pair p trades column leg_a[p] against leg_b[p] with its own β/z series and
+Params, using the same rules as PairBacktester. Tick size and value per
+contract come from CONTRACTS, so sizing and PnL are right for ZT (2 000 $
+per point) as well as ZN/ZF/ZB (1 000 $), and so is the bad-tick guard:
+a bar whose move exceeds the leg's max_jump books no PnL, with the
+threshold scaled to each contract's price volatility. Every bar steps all P pairs
+together (a compiled loop over pairs with numba, vectorized NumPy otherwise),
+so 10+ pairs cost about one pass over the data.
+
+    bt  = PortfolioBacktester(prices, roots, [("ZT", "ZF"), ("ZF", "ZN")], beta, z, ts, params)
+    out = bt.run()              # per-pair pnl/posA/posB (P, n) + total equity (n,)
+"""
+from dataclasses import dataclass
+import numpy as np
+from utils.jit import njit, HAVE_NUMBA
+from backtest.engine import Params, _days, MAX_POINT_JUMP
+from backtest.metrics import (_acc_bar, metrics_init, metrics_from_arrays,
+                              metrics_summary, ACC_SIZE)
+
+
+@dataclass(frozen=True)
+class ContractSpec:
+    root: str
+    tick: float                  # minimum price increment, points
+    tick_value: float            # $ per tick
+    max_jump: float              # largest believable 1-minute move, points (bad-tick guard)
+
+    @property
+    def point_value(self):
+        return self.tick_value / self.tick
+
+
+# max_jump ≈ a full session's typical range: far above any genuine minute
+# move, far below a bad print. ZN and ZF keep the engine's MAX_POINT_JUMP,
+# so a (ZN, ZF) pair books exactly what PairBacktester does.
+CONTRACTS = {s.root: s for s in [
+    ContractSpec("ZT", 1/256, 7.8125, 0.25),    # 2-year,  $200k face
+    ContractSpec("ZF", 1/128, 7.8125, MAX_POINT_JUMP),   # 5-year
+    ContractSpec("ZN", 1/64,  15.625, MAX_POINT_JUMP),   # 10-year
+    ContractSpec("TN", 1/64,  15.625, 1.5),     # ultra 10-year
+    ContractSpec("ZB", 1/32,  31.25,  2.5),     # bond
+    ContractSpec("UB", 1/32,  31.25,  4.0),     # ultra bond
+]}
+CURVE = ["ZT", "ZF", "ZN", "TN", "ZB", "UB"]    # short → long end
+
+
+def curve_pairs(roots=CURVE):
+    """Neighbouring pairs along the curve, long leg first: (ZF, ZT), (ZN, ZF), ..."""
+    return [(hi, lo) for lo, hi in zip(roots[:-1], roots[1:])]
+
+
+_PARAM_FIELDS = ("entry_z", "exit_z", "stop_z", "time_stop_bars",
+                 "budget_usd", "cost_per_entry", "cost_per_exit")
+
+
+@njit(cache=True)
+def _portfolio_loop(px, leg_a, leg_b, tick, tickval, pv, max_jump, beta, z, day,
+                    entry_z, exit_z, stop_z, time_stop_bars, budget_usd,
+                    cost_per_entry, cost_per_exit, pnl, posA, posB, acc, acc_total):
+    """
+    Compiled PortfolioBacktester.run: bars outer, pairs inner. (n, P)
+    buffers are filled unless empty; acc rows (P, ACC_SIZE) and the
+    portfolio accumulator acc_total are updated per bar unless empty.
+    """
+    n, P = px.shape[0], leg_a.shape[0]
+    store = pnl.shape[0] > 0
+    track = acc.shape[0] > 0
+    in_pos = np.zeros(P, dtype=np.bool_)
+    qA = np.zeros(P); qB = np.zeros(P)
+    lastA = np.zeros(P); lastB = np.zeros(P)
+    age = np.zeros(P)
+    eq = np.zeros(P)
+    total = 0.0
+    for i in range(1, n):
+        prev_total = total
+        traded_any = False
+        for p in range(P):
+            ia = leg_a[p]; ib = leg_b[p]
+            da = px[i, ia] - px[i-1, ia]
+            db = px[i, ib] - px[i-1, ib]
+            prev = eq[p]
+            cur = prev
+            heldA = qA[p]; heldB = qB[p]
+            if in_pos[p] and (abs(da) <= max_jump[ia]) and (abs(db) <= max_jump[ib]):
+                cur = cur + qA[p] * (da / tick[ia]) * tickval[ia] + qB[p] * (db / tick[ib]) * tickval[ib]
+                age[p] += 1
+            if store:
+                posA[i, p] = int(qA[p]); posB[i, p] = int(qB[p])
+
+            z_now = z[i, p]
+            nan_z = np.isnan(z_now)
+            az = abs(z_now)
+            if in_pos[p]:
+                if (nan_z or az < exit_z[p] or az > stop_z[p]
+                        or age[p] >= time_stop_bars[p]):
+                    in_pos[p] = False
+                    cur -= cost_per_exit[p]
+                    qA[p] = 0.0; qB[p] = 0.0
+                    age[p] = 0.0
+
+            if (not in_pos[p]) and (not nan_z) and az > entry_z[p]:
+                sgn = -1.0 if z_now > 0 else 1.0
+                bt = beta[i, p]
+                notional = px[i, ia]*pv[ia] + abs(bt)*px[i, ib]*pv[ib]
+                scale = max(1.0, budget_usd[p] / notional)
+                qA[p] = sgn * max(1.0, np.rint(scale))
+                qB[p] = np.sign(-bt * sgn) * max(1.0, np.rint(abs(bt) * scale))
+                in_pos[p] = True
+                cur -= cost_per_entry[p]
+            eq[p] = cur
+            if store:
+                pnl[i, p] = cur
+            changed = heldA != lastA[p] or heldB != lastB[p]
+            traded_any = traded_any or changed
+            if track:
+                _acc_bar(acc[p], prev, cur, changed, day[i])
+            lastA[p] = heldA; lastB[p] = heldB
+        if track:
+            total = 0.0
+            for p in range(P):
+                total += eq[p]
+            _acc_bar(acc_total, prev_total, total, traded_any, day[i])
+
+
+def _portfolio_numpy(px, leg_a, leg_b, tick, tickval, pv, max_jump, beta, z, day,
+                     entry_z, exit_z, stop_z, time_stop_bars, budget_usd,
+                     cost_per_entry, cost_per_exit, pnl, posA, posB):
+    """NumPy fallback for _portfolio_loop: every bar is vectorized over pairs (stores only)."""
+    n, P = px.shape[0], leg_a.shape[0]
+    in_pos = np.zeros(P, dtype=bool)
+    qA = np.zeros(P); qB = np.zeros(P)
+    age = np.zeros(P)
+    ta, tb = tick[leg_a], tick[leg_b]
+    va, vb = tickval[leg_a], tickval[leg_b]
+    pa_, pb_ = pv[leg_a], pv[leg_b]
+    ja, jb = max_jump[leg_a], max_jump[leg_b]
+    for i in range(1, n):
+        da = px[i, leg_a] - px[i-1, leg_a]
+        db = px[i, leg_b] - px[i-1, leg_b]
+        ok = in_pos & (np.abs(da) <= ja) & (np.abs(db) <= jb)
+        pnl[i] = np.where(ok, pnl[i-1] + qA * (da / ta) * va + qB * (db / tb) * vb, pnl[i-1])
+        age += ok
+        posA[i], posB[i] = qA, qB
+
+        z_now = z[i]
+        nan_z = np.isnan(z_now)
+        az = np.abs(z_now)
+        with np.errstate(invalid="ignore"):
+            ext = in_pos & (nan_z | (az < exit_z) | (az > stop_z) | (age >= time_stop_bars))
+            ent = ~(in_pos & ~ext) & ~nan_z & (az > entry_z)
+        pnl[i, ext] -= cost_per_exit[ext]
+        in_pos &= ~ext
+        qA[ext] = qB[ext] = age[ext] = 0
+        if ent.any():
+            sgn = np.where(z_now > 0, -1.0, 1.0)
+            bt = beta[i]
+            notional = px[i, leg_a]*pa_ + np.abs(bt)*px[i, leg_b]*pb_
+            scale = np.maximum(1.0, budget_usd / notional)
+            qA[ent] = (sgn * np.maximum(1.0, np.rint(scale)))[ent]
+            qB[ent] = (np.sign(-bt * sgn) * np.maximum(1.0, np.rint(np.abs(bt) * scale)))[ent]
+            in_pos |= ent
+            pnl[i, ent] -= cost_per_entry[ent]
+
+
+class PortfolioBacktester:
+    """
+    N pair trades over a shared time axis.
+
+    prices: (n, C) leg prices, column c is contract roots[c]
+    pairs:  P (root_a, root_b) tuples; pair p trades spread a - β b
+    beta, z: (n, P) per-pair hedge ratio and z-score
+    params: one Params for every pair, or a sequence of P Params
+
+    Row p of run() equals PairBacktester on the two legs when they are
+    (ZN, ZF): same tick values and the same MAX_POINT_JUMP guard.
+    """
+    def __init__(self, prices, roots, pairs, beta, z, ts, params=Params(),
+                 contracts=CONTRACTS):
+        self.prices = np.ascontiguousarray(prices, dtype=float)
+        self.roots = list(roots)
+        self.pairs = [tuple(p) for p in pairs]
+        P = len(self.pairs)
+        self.beta = np.ascontiguousarray(beta, dtype=float).reshape(-1, P)
+        self.z = np.ascontiguousarray(z, dtype=float).reshape(-1, P)
+        self.ts = ts
+        if self.prices.shape[1] != len(self.roots):
+            raise ValueError("prices must have one column per root")
+        if not (len(self.prices) == len(self.beta) == len(self.z)):
+            raise ValueError("prices, beta and z must share the time axis")
+        try:
+            specs = [contracts[r] for r in self.roots]
+            self.leg_a = np.array([self.roots.index(a) for a, _ in self.pairs], dtype=np.int64)
+            self.leg_b = np.array([self.roots.index(b) for _, b in self.pairs], dtype=np.int64)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"unknown contract root: {e}") from None
+        self.tick    = np.array([s.tick for s in specs])
+        self.tickval = np.array([s.tick_value for s in specs])
+        self.pv      = np.array([s.point_value for s in specs])
+        self.max_jump = np.array([s.max_jump for s in specs])
+
+        params = [params] * P if isinstance(params, Params) else list(params)
+        if len(params) != P:
+            raise ValueError("need one Params per pair")
+        self.params = params
+        for f in _PARAM_FIELDS:
+            setattr(self, f, np.array([getattr(p, f) for p in params], dtype=float))
+
+    def _args(self):
+        return (self.prices, self.leg_a, self.leg_b, self.tick, self.tickval, self.pv,
+                self.max_jump, self.beta, self.z)
+
+    def _param_arrays(self):
+        return tuple(getattr(self, f) for f in _PARAM_FIELDS)
+
+    def run(self):
+        """Per-pair pnl/posA/posB of shape (P, n) and the summed "equity" (n,)."""
+        n, P = len(self.prices), len(self.pairs)
+        pnl  = np.zeros((n, P))
+        posA = np.zeros((n, P), dtype=np.int64)
+        posB = np.zeros((n, P), dtype=np.int64)
+        no_day = np.empty(0, dtype=np.int64)
+        if n and HAVE_NUMBA:
+            _portfolio_loop(*self._args(), no_day, *self._param_arrays(), pnl, posA, posB,
+                            np.empty((0, ACC_SIZE)), np.empty(0))
+        elif n:
+            _portfolio_numpy(*self._args(), no_day, *self._param_arrays(), pnl, posA, posB)
+        return {"pnl": pnl.T, "posA": posA.T, "posB": posB.T, "equity": pnl.sum(axis=1)}
+
+    def run_metrics(self):
+        """
+        {"pairs": [summary per pair], "portfolio": summary of the summed equity};
+        the portfolio turnover counts bars on which any pair changed position.
+        """
+        n, P = len(self.prices), len(self.pairs)
+        day = _days(self.ts, n)
+        if not HAVE_NUMBA:
+            out = self.run()
+            held = np.any((np.diff(out["posA"], axis=1) != 0)
+                          | (np.diff(out["posB"], axis=1) != 0), axis=0)
+            traded = np.concatenate([[0], np.cumsum(held)])
+            return {"pairs": [metrics_summary(metrics_from_arrays(
+                                  out["pnl"][p], out["posA"][p], out["posB"][p], day))
+                              for p in range(P)],
+                    "portfolio": metrics_summary(metrics_from_arrays(
+                        out["equity"], traded, np.zeros(n, dtype=np.int64), day))}
+        acc = np.tile(metrics_init(), (P, 1))
+        acc_total = metrics_init()
+        empty = np.empty((0, P))
+        if n:
+            _portfolio_loop(*self._args(), day, *self._param_arrays(), empty,
+                            empty.astype(np.int64), empty.astype(np.int64), acc, acc_total)
+        return {"pairs": [metrics_summary(row) for row in acc],
+                "portfolio": metrics_summary(acc_total)}
+
+    def net_positions(self, out):
+        """Net contracts per root, shape (C, n), from run() output."""
+        net = np.zeros((len(self.roots), out["posA"].shape[1]), dtype=np.int64)
+        np.add.at(net, self.leg_a, out["posA"])
+        np.add.at(net, self.leg_b, out["posB"])
+        return net
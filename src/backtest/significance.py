@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+"""
+Data-snooping checks for the entry/exit grid search.
+
+The train grid picks the best Sharpe out of G parameter sets; these tests
+ask how likely that best Sharpe is if no set has an edge:
+
+• reality_check – White's Reality Check with a circular block bootstrap
+  over the bar PnL of the whole grid. Block sums are differences of the
+  (G, n) equity curves (and of one cumulative sum of squared bar PnL), so
+  a replay costs n/block lookups per set rather than n, thousands of
+  replays take seconds, and the bar-PnL matrix is never materialized.
+• deflated_sharpe – Bailey & López de Prado's deflated Sharpe ratio of the
+  winner, given the spread of Sharpe ratios across the trials (normal
+  quantiles from statistics.NormalDist).
+• signal_shift_test – randomized-signal replays: z is shifted circularly
+  against the prices (keeping its autocorrelation, breaking its timing) and
+  the whole grid is rerun in one compiled PairGridBacktester equity pass
+  per shift. Shifts run in worker processes over SharedArrays.
+
+significance_report runs all three on one segment's signal arrays.
+
+    python src/backtest/significance.py --boot 10000 --shifts 1000
+"""
+import argparse, math, os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+from utils.jit import njit
+from backtest.engine import PairGridBacktester, _days
+
+ANNUALIZE = 252*6.5*12                       # as backtest.metrics.sharpe
+EULER_GAMMA = 0.5772156649015329
+BOOT_BATCH = 1_000_000                       # gathered block starts × sets per bootstrap batch
+GRID_FIELDS = ("entry_z", "exit_z", "stop_z", "time_stop_bars",
+               "budget_usd", "cost_per_entry", "cost_per_exit")
+
+
+def grid_equity(arrays, grid):
+    """(G, n) cumulative PnL of every Params in `grid` on arrays (keys a, b, beta, alpha, z, ts)."""
+    return _grid(arrays, arrays["z"], _grid_cols(grid)).equity()
+
+
+def bar_sharpe(returns, scale=ANNUALIZE):
+    """Row-wise Sharpe of bar returns (population std, like metrics.sharpe); 0 when flat."""
+    r = np.atleast_2d(np.asarray(returns, dtype=float))
+    return _sharpe(r.mean(axis=1), r.var(axis=1), scale)
+
+
+def _sharpe(mean, var, scale):
+    sd = np.sqrt(np.maximum(var, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(sd > 0, mean / sd * np.sqrt(scale), 0.0)
+
+
+@njit(cache=True)
+def _cum_sq(eq):
+    """(n, G) running sum of squared bar PnL for (G, n) equity; row 0 is zero."""
+    G, n = eq.shape
+    c = np.zeros((n, G))
+    for i in range(1, n):
+        for g in range(G):
+            r = eq[g, i] - eq[g, i-1]
+            c[i, g] = c[i-1, g] + r * r
+    return c
+
+
+@njit(cache=True)
+def _equity_moments(eq):
+    """Mean and population variance of each row's bar PnL, straight from (G, n) equity."""
+    G, n = eq.shape
+    s1 = np.zeros(G); s2 = np.zeros(G)
+    for i in range(1, n):
+        for g in range(G):
+            r = eq[g, i] - eq[g, i-1]
+            s1[g] += r
+            s2[g] += r * r
+    m = max(n - 1, 1)
+    mean = s1 / m
+    return mean, s2 / m - mean * mean
+
+
+def equity_sharpe(eq, scale=ANNUALIZE):
+    """bar_sharpe(np.diff(eq)) without materializing the (G, n-1) returns."""
+    return _sharpe(*_equity_moments(np.atleast_2d(np.asarray(eq, dtype=float))), scale)
+
+
+def block_length(ts, n=None):
+    """Default bootstrap block: the mean number of bars per trading day."""
+    n = len(ts) if n is None else n
+    days = np.unique(_days(ts, len(ts)))
+    return max(1, round(n / max(len(days), 1)))
+
+
+def reality_check(equity, n_boot=10_000, block=390, statistic="sharpe",
+                  scale=ANNUALIZE, seed=0):
+    """
+    White's Reality Check of H0 "no parameter set beats flat" for the grid's
+    (G, n) equity curves (bar PnL = first differences). statistic="sharpe"
+    (default, what the grid selects on) or "mean" (White's original). The
+    bootstrap draws (n-1) // block circular blocks of `block` bars, the same
+    starts for every set so the cross-set correlation is kept, and
+    recentres each set's statistic on its sample value.
+
+    Memory: one (n, G) float64 matrix besides `equity` (none for "mean").
+
+    Returns dict(best, stat, p_value, null): `null` holds the n_boot
+    bootstrap maxima of the recentred statistic.
+    """
+    eq = np.atleast_2d(np.asarray(equity, dtype=float))
+    if statistic not in ("sharpe", "mean"):
+        raise ValueError(f"unknown statistic {statistic!r}")
+    G, m = eq.shape[0], eq.shape[1] - 1                  # m bar returns per set
+    block = int(min(max(block, 1), m))
+    k = max(1, m // block)
+
+    # block sum over returns [s, s+block) is c[s+block] - c[s] for a cumulative c;
+    # blocks running past the end wrap, adding one full-sample total
+    c1 = eq.T                                            # (n, G): bar-major rows
+    c2 = _cum_sq(eq) if statistic == "sharpe" else None
+    if statistic == "sharpe":
+        obs = equity_sharpe(eq, scale)
+    else:
+        obs = (eq[:, -1] - eq[:, 0]) / m * np.sqrt(m)
+    best = int(np.argmax(obs))
+
+    rng = np.random.default_rng(seed)
+    null = np.empty(n_boot)
+    batch = max(1, BOOT_BATCH // (k * G))
+    for lo in range(0, n_boot, batch):
+        starts = rng.integers(0, m, size=(min(batch, n_boot - lo), k))
+        end = starts + block
+        wraps = (end > m).sum(axis=1)[:, None]
+        end = np.where(end > m, end - m, end)
+        mean = _block_total(c1, starts, end, wraps) / (k * block)   # (batch, G)
+        if statistic == "sharpe":
+            var = _block_total(c2, starts, end, wraps) / (k * block) - mean * mean
+            stat = _sharpe(mean, var, scale)
+        else:
+            stat = mean * np.sqrt(m)
+        null[lo:lo + len(starts)] = (stat - obs).max(axis=1)
+    p = (1 + np.count_nonzero(null >= obs[best])) / (n_boot + 1)
+    return dict(best=best, stat=float(obs[best]), p_value=float(p), null=null)
+
+
+def _block_total(c, starts, end, wraps):
+    """Sum over each draw's blocks of c[end] - c[start], plus the wrap-around totals."""
+    return (c[end].sum(axis=1) - c[starts].sum(axis=1)) + wraps * (c[-1] - c[0])
+
+
+def deflated_sharpe(returns, trial_sharpes, n_trials=None):
+    """
+    Deflated Sharpe ratio of the selected strategy's bar `returns`, where
+    `trial_sharpes` are the per-bar (non-annualized) Sharpe ratios of all
+    trials the selection was made from. sr0 is the expected maximum Sharpe
+    of n_trials unskilled trials; dsr is the probability that the true
+    Sharpe exceeds it, adjusted for skew and kurtosis. p_value = 1 - dsr.
+    """
+    r = np.asarray(returns, dtype=float)
+    T = len(r)
+    mu, sd = r.mean(), r.std()
+    if T < 2 or sd == 0:
+        return dict(sharpe=0.0, sr0=0.0, dsr=0.0, p_value=1.0)
+    sr = mu / sd
+    skew = np.mean((r - mu) ** 3) / sd ** 3
+    kurt = np.mean((r - mu) ** 4) / sd ** 4
+    trials = np.asarray(trial_sharpes, dtype=float)
+    N = n_trials or len(trials)
+    nd = NormalDist()
+    sr0 = 0.0
+    if N > 1 and len(trials) > 1:
+        sr0 = math.sqrt(trials.var(ddof=1)) * (
+            (1 - EULER_GAMMA) * nd.inv_cdf(1 - 1 / N)
+            + EULER_GAMMA * nd.inv_cdf(1 - 1 / (N * math.e)))
+    denom = 1 - skew * sr + (kurt - 1) / 4 * sr * sr
+    dsr = nd.cdf((sr - sr0) * math.sqrt(T - 1) / math.sqrt(max(denom, 1e-12)))
+    return dict(sharpe=float(sr), sr0=float(sr0), dsr=float(dsr), p_value=float(1 - dsr))
+
+
+# ---- randomized-signal replays ------------------------------------------------
+def _grid_cols(grid):
+    return {f: np.array([getattr(p, f) for p in grid], dtype=float) for f in GRID_FIELDS}
+
+
+def _grid(arrays, z, cols):
+    return PairGridBacktester(arrays["a"], arrays["b"], arrays["beta"], arrays["alpha"],
+                              z, arrays["ts"], **cols)
+
+
+def shifted_max_sharpe(arrays, grid, shifts):
+    """Best grid Sharpe with z rolled by each shift (one grid pass per shift)."""
+    cols = _grid_cols(grid)
+    z = np.asarray(arrays["z"], dtype=float)
+    return np.array([equity_sharpe(_grid(arrays, np.roll(z, int(s)), cols).equity()).max()
+                     for s in shifts])
+
+
+_WORKER = {}
+
+def _init_worker(spec):
+    from pipeline.sweep import SharedArrays
+    _WORKER["arrays"], _WORKER["blocks"] = SharedArrays.attach(spec)
+
+def _shifted_shared(args):
+    return shifted_max_sharpe(_WORKER["arrays"], *args)
+
+
+def signal_shift_test(arrays, grid, n_shifts=1_000, min_shift=None, seed=0, workers=None):
+    """
+    Permutation-style test of the grid's best Sharpe: rerun the grid with z
+    circularly shifted by n_shifts random offsets in [min_shift, n - min_shift]
+    (default min_shift: one trading day) and compare the observed best
+    Sharpe with the shifted maxima. Returns dict(stat, p_value, shifts, null).
+    """
+    from pipeline.sweep import SharedArrays, FIELDS
+    n = len(arrays["a"])
+    min_shift = block_length(arrays["ts"]) if min_shift is None else min_shift
+    if n <= 2 * min_shift:
+        raise ValueError(f"{n} bars leave no room for shifts of at least {min_shift}")
+    shifts = np.random.default_rng(seed).integers(min_shift, n - min_shift + 1, size=n_shifts)
+    stat = float(shifted_max_sharpe(arrays, grid, [0])[0])
+
+    workers = min(workers or os.cpu_count() or 1, max(n_shifts, 1))
+    if workers == 1:
+        null = shifted_max_sharpe(arrays, grid, shifts)
+    else:
+        chunks = np.array_split(shifts, 4 * workers)
+        with SharedArrays(**{f: arrays[f] for f in FIELDS}) as shm, \
+             ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.spec,)) as pool:
+            null = np.concatenate(list(pool.map(_shifted_shared,
+                                                [(grid, c) for c in chunks])))
+    p = (1 + np.count_nonzero(null >= stat)) / (n_shifts + 1)
+    return dict(stat=float(stat), p_value=float(p), shifts=shifts, null=null)
+
+
+def significance_report(arrays, grid, n_boot=10_000, n_shifts=1_000, block=None,
+                        seed=0, workers=None, equity=None):
+    """
+    Deflated Sharpe, Reality Check (n_boot > 0) and signal-shift test
+    (n_shifts > 0) of the best grid point on one segment. Returns a flat
+    dict (best, params, sharpe, sr0, dsr, dsr_p, and rc_p / shift_p).
+
+    `equity` is the (G, n) grid_equity(arrays, grid) when the caller already
+    has it. Peak memory is two (n, G) float64 matrices (16·G bytes per bar).
+    """
+    eq = grid_equity(arrays, grid) if equity is None else equity
+    per_bar = equity_sharpe(eq, scale=1)
+    best = int(np.argmax(per_bar))
+    ds = deflated_sharpe(np.diff(eq[best]), per_bar)
+    out = dict(best=best, params=grid[best], sharpe=float(per_bar[best] * math.sqrt(ANNUALIZE)),
+               sr0=ds["sr0"] * math.sqrt(ANNUALIZE), dsr=ds["dsr"], dsr_p=ds["p_value"])
+    if n_boot:
+        out["block"] = block or block_length(arrays["ts"], eq.shape[1] - 1)
+        out["rc_p"] = reality_check(eq, n_boot, out["block"], seed=seed)["p_value"]
+    del eq, equity
+    if n_shifts:
+        out["shift_p"] = signal_shift_test(arrays, grid, n_shifts, seed=seed,
+                                           workers=workers)["p_value"]
+    return out
+
+
+def describe(rep):
+    """One-line summary of a significance_report."""
+    parts = [f"deflated Sharpe p {rep['dsr_p']:.3f} (unskilled max {rep['sr0']:.2f})"]
+    if "rc_p" in rep:
+        parts.append(f"Reality Check p {rep['rc_p']:.3f}")
+    if "shift_p" in rep:
+        parts.append(f"signal-shift p {rep['shift_p']:.3f}")
+    return " | ".join(parts)
+
+
+if __name__ == "__main__":
+    import time
+    from pipeline.signals import signal_bars
+    from pipeline.sweep import entry_exit_grid, FIELDS
+    from pipeline.run_backtest import CUT1
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--boot", type=int, default=10_000, help="bootstrap replays")
+    ap.add_argument("--shifts", type=int, default=1_000, help="signal-shift replays (0: skip)")
+    ap.add_argument("--block", type=int, default=None, help="bootstrap block in bars (default: one day)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    train, _ = signal_bars().split(CUT1)
+    arrays = dict(zip(FIELDS, [*(train[c] for c in ["ZN", "ZF", "beta", "alpha", "z"]), train.ts]))
+    t0 = time.perf_counter()
+    rep = significance_report(arrays, entry_exit_grid(), args.boot, args.shifts,
+                              args.block, args.seed, args.workers)
+    p = rep["params"]
+    print(f"best e={p.entry_z:.2f} x={p.exit_z:.2f}  train Sharpe {rep['sharpe']:.2f}  "
+          f"({time.perf_counter() - t0:.1f}s)")
+    print(describe(rep))
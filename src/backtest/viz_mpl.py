@@ -4,7 +4,12 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.ticker import FuncFormatter
+from matplotlib.collections import PolyCollection
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from backtest.downsample import downsample, to_datetime64
+
+NS_PER_DAY = 86_400 * 10**9
 
 def _fmt_dollars(y, _pos=None):
     ay = abs(y)
@@ -13,26 +18,47 @@ def _fmt_dollars(y, _pos=None):
     if ay >= 1e3:  return f"${y/1e3:.0f}K"
     return f"${y:.0f}"
 
+def _date_num(ts):
+    """datetime64 → Matplotlib date numbers straight from int64 ns (no to_pydatetime)."""
+    ns = to_datetime64(ts).view(np.int64)
+    epoch = np.datetime64(mdates.get_epoch(), "ns").view(np.int64)
+    return (ns - epoch) / NS_PER_DAY
+
 def _bar_width_from_index(idx):
-    x = mdates.date2num(pd.DatetimeIndex(idx).to_pydatetime())
+    x = _date_num(idx)
     return 0.8 * float(np.median(np.diff(x))) if len(x) > 1 else 0.8
 
-def save_equity_bars_png(dt, pnl, out_path, freq="D", title="Equity & PnL"):
+def _bars(ax, x, h, width, colors, alpha):
+    """ax.bar look-alike drawn as one PolyCollection (one artist instead of a patch per bar)."""
+    x0, x1 = x - width / 2, x + width / 2
+    zero = np.zeros_like(h)
+    verts = np.stack([np.column_stack(c) for c in
+                      [(x0, zero), (x0, h), (x1, h), (x1, zero)]], axis=1)
+    ax.add_collection(PolyCollection(verts, facecolors=colors, edgecolors="none",
+                                     alpha=alpha, linewidths=0))
+    if len(x):
+        ax.update_datalim([(x0.min(), min(h.min(), 0)), (x1.max(), max(h.max(), 0))])
+    ax.autoscale_view()
+
+def save_equity_bars_png(dt, pnl, out_path, freq="D", title="Equity & PnL",
+                         downsample_method="minmax"):
     out_path = Path(out_path); out_path.parent.mkdir(parents=True, exist_ok=True)
-    s = pd.Series(pnl, index=pd.DatetimeIndex(dt))
+    ts = to_datetime64(dt)
+    s = pd.Series(pnl, index=pd.DatetimeIndex(ts))
     ret = s.diff().resample(freq).sum().dropna()
     colors = np.where(ret.values >= 0, "#22c55e", "#ef4444")  # green/red
 
     fig, ax1 = plt.subplots(figsize=(11, 4))
-    x = mdates.date2num(ret.index.to_pydatetime())
-    ax1.bar(x, ret.values, width=_bar_width_from_index(ret.index), color=colors, alpha=0.85)
+    x = _date_num(ret.index.values)
+    _bars(ax1, x, ret.values.astype(float), _bar_width_from_index(ret.index.values), colors, 0.85)
     ax1.xaxis_date()
     ax1.set_ylabel(f"{freq} PnL")
     ax1.yaxis.set_major_formatter(FuncFormatter(_fmt_dollars))
     #ax1.ticklabel_format(axis="y", style="plain")  # disable 1eN
 
     ax2 = ax1.twinx()
-    ax2.plot(s.index, s.values, lw=1.8, color="#1f2937")
+    xs, ys = downsample(ts, np.asarray(pnl), downsample_method)   # min/max kept per pixel
+    ax2.plot(_date_num(xs), ys, lw=1.8, color="#1f2937")
     ax2.set_ylabel("Equity")
     ax2.yaxis.set_major_formatter(FuncFormatter(_fmt_dollars))
     #ax2.ticklabel_format(axis="y", style="plain")
@@ -43,12 +69,15 @@ def save_equity_bars_png(dt, pnl, out_path, freq="D", title="Equity & PnL"):
     fig.savefig(out_path, dpi=150)
     plt.close(fig)
 
-def save_equity_combined_png(train_dt, train_pnl, test_dt, test_pnl, valid_dt, valid_pnl, out_path):
+def save_equity_combined_png(train_dt, train_pnl, test_dt, test_pnl, valid_dt, valid_pnl, out_path,
+                             downsample_method="minmax"):
     out_path = Path(out_path); out_path.parent.mkdir(parents=True, exist_ok=True)
     fig, ax = plt.subplots(figsize=(11, 4))
-    ax.plot(pd.DatetimeIndex(train_dt), train_pnl, label="train", lw=1.8)
-    ax.plot(pd.DatetimeIndex(test_dt),  test_pnl,  label="test",  lw=1.8)
-    ax.plot(pd.DatetimeIndex(valid_dt), valid_pnl, label="valid", lw=1.8)
+    for dt, pnl, label in [(train_dt, train_pnl, "train"), (test_dt, test_pnl, "test"),
+                           (valid_dt, valid_pnl, "valid")]:
+        xs, ys = downsample(to_datetime64(dt), np.asarray(pnl), downsample_method)
+        ax.plot(_date_num(xs), ys, label=label, lw=1.8)
+    ax.xaxis_date()
     ax.set_title("Cumulative PnL ($) — Train/Test/Validation")
     ax.set_ylabel("Equity ($)")
     ax.yaxis.set_major_formatter(FuncFormatter(_fmt_dollars))
@@ -57,3 +86,20 @@ def save_equity_combined_png(train_dt, train_pnl, test_dt, test_pnl, valid_dt, v
     fig.tight_layout()
     fig.savefig(out_path, dpi=150)
     plt.close(fig)
+
+def _render(job):
+    fn, args, kwargs = job
+    fn(*args, **kwargs)
+
+def render_parallel(jobs, workers=None):
+    """
+    Run (fn, args, kwargs) plot jobs in a process pool; each figure renders
+    in its own process. workers=1 (or a single job) renders inline.
+    """
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            _render(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers or min(len(jobs), 4)) as pool:
+        list(pool.map(_render, jobs))
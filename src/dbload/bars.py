@@ -0,0 +1,101 @@
+"""
+Load processed minute bars with the session / date filters pushed into the
+Parquet scan.
+
+The year/month hive partitions written by make_bars prune whole files for a
+date range, the ts_event bounds are checked against row-group statistics,
+and the time-of-day filter runs inside the scan, so rows outside the window
+are never materialized. Splits are NumPy views into one set of arrays.
+
+    bars = load_bars(start=datetime(2024, 1, 1, tzinfo=UTC))
+    train, test, valid = bars.split(CUT1, CUT2)
+"""
+from datetime import datetime, time, timedelta, timezone
+import numpy as np
+import polars as pl
+
+UTC     = timezone.utc
+DATASET = "data/processed/ZNZF_1m"
+RTH     = (time(13, 20), time(20, 30))          # UTC session window, inclusive
+
+
+def _utc(d: datetime) -> datetime:
+    return d.replace(tzinfo=UTC) if d.tzinfo is None else d.astimezone(UTC)
+
+
+def _month_bound(col_y, col_m, d, lower):
+    """Partition predicate keeping (year, month) on the right side of d."""
+    y, m = pl.col(col_y), pl.col(col_m)
+    if lower:
+        return (y > d.year) | ((y == d.year) & (m >= d.month))
+    return (y < d.year) | ((y == d.year) & (m <= d.month))
+
+
+def scan_bars(path=DATASET, start: datetime = None, end: datetime = None,
+              session=RTH, columns=("ZN", "ZF")) -> pl.LazyFrame:
+    """
+    Lazy scan of the partitioned dataset restricted to [start, end) and the
+    daily `session` window (None = all day). Nothing is read until collect().
+    Naive bounds are taken as UTC; naive ts_event columns are taken as UTC too.
+    """
+    lf = pl.scan_parquet(f"{path}/**/*.parquet", hive_partitioning=True)
+    naive = lf.collect_schema()["ts_event"].time_zone is None   # schema only, no data read
+    preds = []
+    if start is not None:
+        start = _utc(start)
+        start = start.replace(tzinfo=None) if naive else start
+        preds += [_month_bound("year", "month", start, lower=True),
+                  pl.col("ts_event") >= start]
+    if end is not None:
+        end = _utc(end)
+        end = end.replace(tzinfo=None) if naive else end
+        preds += [_month_bound("year", "month", end - timedelta(microseconds=1), lower=False),
+                  pl.col("ts_event") < end]
+    if session is not None:
+        preds.append(pl.col("ts_event").dt.time().is_between(*session, closed="both"))
+    if preds:
+        lf = lf.filter(pl.all_horizontal(preds))
+    return lf.select(["ts_event", *columns])
+
+
+class Bars:
+    """
+    Columnar bars: `ts` (datetime64, UTC) plus named float arrays of equal
+    length. Indexing by name returns the array; `split` returns Bars whose
+    arrays are views, not copies.
+    """
+    def __init__(self, ts, **cols):
+        self.ts = ts
+        self.cols = cols
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, name):
+        return self.cols[name]
+
+    def with_columns(self, **cols):
+        return Bars(self.ts, **self.cols, **cols)
+
+    def _index(self, cut: datetime):
+        cut = np.datetime64(_utc(cut).replace(tzinfo=None), "ns").astype(self.ts.dtype)
+        return int(np.searchsorted(self.ts, cut, side="left"))
+
+    def slice(self, lo, hi):
+        return Bars(self.ts[lo:hi], **{k: v[lo:hi] for k, v in self.cols.items()})
+
+    def split(self, *cuts: datetime):
+        """Split at the given datetimes: len(cuts)+1 views covering [.., cut1), [cut1, cut2), ..."""
+        idx = [0, *(self._index(c) for c in cuts), len(self)]
+        return [self.slice(lo, hi) for lo, hi in zip(idx[:-1], idx[1:])]
+
+
+def load_bars(path=DATASET, start=None, end=None, session=RTH,
+              columns=("ZN", "ZF")) -> Bars:
+    """Collect `scan_bars(...)` into Bars sorted by ts_event."""
+    df = scan_bars(path, start, end, session, columns).collect()
+    if not df["ts_event"].is_sorted():
+        df = df.sort("ts_event")
+    df = df.rechunk()                       # one buffer per column → to_numpy is zero-copy
+    return Bars(df["ts_event"].to_numpy(),
+                **{c: df[c].to_numpy() for c in columns})
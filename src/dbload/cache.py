@@ -0,0 +1,116 @@
+"""
+On-disk cache of filtered bars + derived signals as uncompressed .npy files.
+
+Entries are opened with np.load(mmap_mode="r"), so a warm start costs a few
+page-table updates instead of a Parquet decode + sort + Kalman pass, and
+concurrent processes share the same page cache. Keys hash the source files
+(path, size, mtime), the session filter and the signal hyperparameters;
+least-recently-used entries are evicted once the cache exceeds `max_bytes`.
+Eviction renames an entry to a tombstone before deleting it, and a reader
+racing an eviction or clear() gets a miss, never an error or a partial entry.
+
+    cache = BarCache()
+    key   = cache_key(sources, session=RTH, q=1e-4, r=1e-2, k=0.01)
+    bars  = cache.get_or_build(key, build_bars)
+"""
+import hashlib, json, os, pathlib, shutil, time
+import numpy as np
+from dbload.bars import Bars
+
+CACHE_DIR = "data/cache/bars"
+MAX_BYTES = 4e9
+_TS, _USED = "ts", "_used"
+
+
+def cache_key(sources, **settings) -> str:
+    """Hash of the source files' identity plus any JSON-able settings."""
+    h = hashlib.sha256()
+    for src in sorted(map(str, sources)):
+        st = os.stat(src)
+        h.update(f"{src}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    h.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:32]
+
+
+def _touch(path):
+    # explicit ns stamp: a bare touch uses the kernel's coarse clock, so
+    # back-to-back uses could tie and evict the wrong entry
+    path.touch()
+    t = time.time_ns()
+    os.utime(path, ns=(t, t))
+
+
+def _dir_size(path):
+    return sum(p.stat().st_size for p in path.iterdir() if p.is_file())
+
+
+class BarCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root = pathlib.Path(root)
+        self.max_bytes = max_bytes
+
+    def _entries(self):
+        if not self.root.exists():
+            return []
+        return [p for p in self.root.iterdir()                  # skip tmp dirs and tombstones
+                if p.is_dir() and not p.name.startswith(".") and (p / _USED).exists()]
+
+    def get(self, key) -> Bars | None:
+        """Memory-mapped Bars for `key`, or None on a miss."""
+        entry = self.root / key
+        if not (entry / _USED).exists():
+            return None
+        try:                                                    # evict()/clear() may race us
+            _touch(entry / _USED)                               # LRU clock
+            cols = {p.stem: np.load(p, mmap_mode="r") for p in entry.glob("*.npy")}
+            return Bars(cols.pop(_TS), **cols)
+        except (FileNotFoundError, KeyError):
+            return None
+
+    def put(self, key, bars: Bars) -> Bars:
+        """
+        Store `bars` under `key` and return the memory-mapped copy. If
+        another process published `key` first, its entry is returned; if that
+        entry is unusable (half-evicted, or gone again), `bars` itself is.
+        """
+        entry = self.root / key
+        tmp = self.root / f".{key}.{os.getpid()}.tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        np.save(tmp / f"{_TS}.npy", np.ascontiguousarray(bars.ts))
+        for name, arr in bars.cols.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr))
+        _touch(tmp / _USED)
+        try:
+            os.rename(tmp, entry)                               # atomic publish
+        except OSError:                                         # another process got there first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+        cached = self.get(key)
+        return cached if cached is not None else bars
+
+    def get_or_build(self, key, build) -> Bars:
+        """Cached Bars for `key`, calling build() -> Bars on a miss."""
+        bars = self.get(key)
+        return bars if bars is not None else self.put(key, build())
+
+    def evict(self, keep=None):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda p: (p / _USED).stat().st_mtime_ns)
+        total = sum(_dir_size(p) for p in entries)
+        for p in entries:
+            if total <= self.max_bytes:
+                break
+            if p.name == keep:
+                continue
+            total -= _dir_size(p)
+            # atomic unpublish first, so nobody globs a half-deleted entry; readers
+            # that already mapped the files keep their pages until they unmap
+            tomb = p.with_name(f".{p.name}.{os.getpid()}.evicted")
+            try:
+                os.rename(p, tomb)
+            except OSError:                                     # another process evicted it
+                continue
+            shutil.rmtree(tomb, ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -1,2 +1,175 @@
-# Databento loaders & roll logic
-# ...implementation placeholder...
+"""
+Chunked, resumable Databento downloads straight to Parquet.
+
+The requested range is split into calendar-month chunks that are fetched
+concurrently (at most `workers` requests in flight). Each chunk's DBN
+response goes to a temporary file, is decoded `batch` records at a time with
+DBNStore.to_df(count=...) and appended to a Parquet file one row group per
+batch, so memory stays bounded by the batch size, not by a year of bars. A
+finished chunk is renamed into place atomically and recorded in
+`_manifest.json` together with its request settings; a rerun skips chunks
+whose file and settings still match and refetches the rest (including the
+last, partial month once the dataset has grown).
+
+    client = databento.Historical(key)
+    download(client, "2018-01-02", "2025-07-25", "data/raw/databento",
+             dataset="GLBX.MDP3", schema="ohlcv-1m", symbols=["ZN.FUT", "ZF.FUT"])
+
+Output files are <prefix>_<YYYY-MM>.parquet (ts_event, rtype, ..., symbol),
+which make_bars picks up with its default ZNZF_*.parquet glob.
+"""
+import calendar, datetime as dt, hashlib, inspect, json, os, pathlib, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+import pyarrow as pa, pyarrow.parquet as pq
+
+PREFIX   = "ZNZF"
+BATCH    = 500_000                  # DBN records per Parquet row group
+WORKERS  = 4                        # concurrent requests
+MANIFEST = "_manifest.json"
+
+
+@dataclass
+class Chunk:
+    label: str                      # "2018-01"
+    start: dt.datetime
+    end: dt.datetime                # exclusive
+
+
+def _as_datetime(x):
+    """datetime / date / ISO string → naive UTC (aware inputs are converted first)."""
+    d = x if isinstance(x, dt.datetime) else dt.datetime.fromisoformat(str(x).replace("Z", "+00:00"))
+    return d.astimezone(dt.timezone.utc).replace(tzinfo=None) if d.tzinfo else d
+
+
+def month_chunks(start, end):
+    """Calendar-month chunks covering [start, end), clipped at both ends."""
+    start, end = _as_datetime(start), _as_datetime(end)
+    chunks = []
+    lo = start
+    while lo < end:
+        last_day = calendar.monthrange(lo.year, lo.month)[1]
+        nxt = dt.datetime(lo.year, lo.month, last_day) + dt.timedelta(days=1)
+        hi = min(nxt, end)
+        chunks.append(Chunk(f"{lo:%Y-%m}", lo, hi))
+        lo = hi
+    return chunks
+
+
+def _accepts(fn, name):
+    try:
+        return name in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def request_kwargs(client, chunk: Chunk, dataset, schema, symbols, adjust=None,
+                   stype_in="parent"):
+    """get_range arguments for one chunk; adjust_continuous only if the SDK has it."""
+    kwargs = dict(dataset=dataset, schema=schema, symbols=list(symbols), stype_in=stype_in,
+                  start=chunk.start.isoformat(), end=chunk.end.isoformat())
+    if adjust is not None and _accepts(client.timeseries.get_range, "adjust_continuous"):
+        kwargs["adjust_continuous"] = adjust
+    return kwargs
+
+
+def _settings_hash(kwargs):
+    return hashlib.sha256(json.dumps(kwargs, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def write_parquet(frames, path):
+    """Append DataFrames (ts_event index) to `path` as row groups; returns rows written."""
+    writer, rows = None, 0
+    try:
+        for df in frames:
+            if not len(df):
+                continue
+            table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(str(path), table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def fetch_chunk(client, chunk: Chunk, out_dir, kwargs, prefix=PREFIX, batch=BATCH):
+    """Fetch one chunk into <prefix>_<label>.parquet; returns its manifest entry."""
+    out_dir = pathlib.Path(out_dir)
+    final = out_dir / f"{prefix}_{chunk.label}.parquet"
+    tmp = out_dir / f".{final.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    dbn = tmp.with_suffix(".dbn")
+    try:
+        if _accepts(client.timeseries.get_range, "path"):
+            store = client.timeseries.get_range(**kwargs, path=dbn)   # response streamed to disk
+        else:
+            store = client.timeseries.get_range(**kwargs)
+        rows = write_parquet(store.to_df(count=batch), tmp)
+        if rows:
+            os.replace(tmp, final)                                     # atomic publish
+        else:
+            final.unlink(missing_ok=True)                              # nothing traded
+    finally:
+        tmp.unlink(missing_ok=True)
+        dbn.unlink(missing_ok=True)
+    return dict(start=kwargs["start"], end=kwargs["end"], settings=_settings_hash(kwargs),
+                rows=rows, bytes=final.stat().st_size if rows else 0,
+                file=final.name if rows else None)
+
+
+def dataset_end(client, dataset):
+    """Last available timestamp of `dataset`, naive UTC."""
+    return _as_datetime(client.metadata.get_dataset_range(dataset=dataset)["end"])
+
+
+def _is_complete(entry, out_dir, settings):
+    if entry is None or entry["settings"] != settings:
+        return False
+    if entry["file"] is None:
+        return True
+    path = out_dir / entry["file"]
+    return path.exists() and path.stat().st_size == entry["bytes"]
+
+
+def download(client, start, end, out_dir, dataset, schema, symbols, adjust=None,
+             prefix=PREFIX, workers=WORKERS, batch=BATCH, log=print):
+    """
+    Bring out_dir up to date for [start, end) (clipped to the dataset's end).
+    Returns the labels of the chunks fetched by this call.
+    """
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    end = min(_as_datetime(end), dataset_end(client, dataset))
+    man_path = out_dir / MANIFEST
+    manifest = json.loads(man_path.read_text()) if man_path.exists() else {}
+    done = manifest.setdefault("chunks", {})
+
+    todo = []
+    for chunk in month_chunks(start, end):
+        kwargs = request_kwargs(client, chunk, dataset, schema, symbols, adjust)
+        if not _is_complete(done.get(f"{prefix}_{chunk.label}"), out_dir, _settings_hash(kwargs)):
+            todo.append((chunk, kwargs))
+    log(f"{len(todo)} chunk(s) to fetch, {len(month_chunks(start, end)) - len(todo)} up to date")
+
+    fetched, failed = [], {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futs = {pool.submit(fetch_chunk, client, c, out_dir, kw, prefix, batch): c
+                for c, kw in todo}
+        for fut in as_completed(futs):
+            chunk = futs[fut]
+            try:
+                entry = fut.result()
+            except Exception as e:                       # keep going; a rerun retries it
+                failed[chunk.label] = e
+                log(f"   {chunk.label}: failed ({e!r})")
+                continue
+            done[f"{prefix}_{chunk.label}"] = entry
+            man_path.write_text(json.dumps(manifest, indent=1))   # progress survives a crash
+            fetched.append(chunk.label)
+            log(f"   {chunk.label}: {entry['rows']:,} rows ({entry['bytes']/1e6:,.1f} MB)")
+    if failed:
+        raise RuntimeError(f"{len(failed)} chunk(s) failed: {', '.join(sorted(failed))}") \
+            from next(iter(failed.values()))
+    return sorted(fetched)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+Stream a Databento MBP-10 file (.dbn / .dbn.zst) into per-minute book
+features without decoding it to a DataFrame:
+
+    ts_event (minute), root, microprice, spread, imbalance, bid_px, ask_px, n_updates
+
+Records are read in fixed-size batches (DBNStore.to_ndarray(count=...)),
+reduced to the last top-of-book snapshot per root and minute, and written
+as Parquet row groups, so memory is bounded by the batch size whatever the
+file size. Records arrive in ts_recv order, so a root's ts_event can step
+back across a minute boundary (5 → 4 → 5) and roots finish their minutes
+at different times: the (small) minute table is merged on (minute, root)
+and sorted on ts_event once at the end, before it is published at the
+output path. Like make_bars, all expiries of a root share one series;
+calendar spreads are dropped.
+
+    python src/dbload/mbp10.py data/raw/databento/mbp10/ZNZF_mbp10_2023.dbn.zst \
+        --out data/processed/ZNZF_mbp10_1m.parquet
+
+To use microprices in place of closes:
+    pl.read_parquet(out).pivot(on="root", index="ts_event", values="microprice")
+"""
+import argparse, pathlib
+import numpy as np
+import pyarrow as pa, pyarrow.parquet as pq
+
+ROOTS       = ["ZN", "ZF"]
+LEVELS      = 10
+BATCH       = 1_000_000                  # DBN records per batch
+ROW_GROUP   = 100_000                    # output rows per Parquet row group
+PRICE_SCALE = 1e-9                       # DBN fixed-point prices
+UNDEF_PRICE = np.iinfo(np.int64).max
+NS_PER_MIN  = 60_000_000_000
+
+SCHEMA = pa.schema([("ts_event", pa.timestamp("ns", tz="UTC")), ("root", pa.string()),
+                    ("microprice", pa.float64()), ("spread", pa.float64()),
+                    ("imbalance", pa.float64()), ("bid_px", pa.float64()),
+                    ("ask_px", pa.float64()), ("n_updates", pa.int64())])
+
+
+def book_features(rec):
+    """Vectorized per-record features from an MBP-10 structured array."""
+    bid, ask = rec["bid_px_00"], rec["ask_px_00"]
+    ok = (bid != UNDEF_PRICE) & (ask != UNDEF_PRICE)
+    bid = bid * PRICE_SCALE; ask = ask * PRICE_SCALE
+    bsz = rec["bid_sz_00"].astype(float); asz = rec["ask_sz_00"].astype(float)
+    bdepth = sum(rec[f"bid_sz_{i:02d}"].astype(float) for i in range(LEVELS))
+    adepth = sum(rec[f"ask_sz_{i:02d}"].astype(float) for i in range(LEVELS))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        micro = np.where(bsz + asz > 0, (bid*asz + ask*bsz) / (bsz + asz), 0.5*(bid + ask))
+        imb   = (bdepth - adepth) / (bdepth + adepth)
+    return ok, dict(microprice=micro, spread=ask - bid, imbalance=imb,
+                    bid_px=bid, ask_px=ask)
+
+
+class BookBarAggregator:
+    """
+    Last snapshot per (root, minute), fed batch by batch. A root's latest
+    minute is held back until a different minute (or close()) ends it; a
+    minute that ts_event revisits gets more than one partial row, which
+    close() merges (last snapshot, summed n_updates).
+    """
+    FEATURES = ("microprice", "spread", "imbalance", "bid_px", "ask_px")
+
+    def __init__(self, out_path, roots=ROOTS, row_group=ROW_GROUP):
+        self.roots = list(roots)
+        self.row_group = row_group
+        self.out_path = pathlib.Path(out_path)
+        self.tmp_path = self.out_path.with_name(self.out_path.name + ".tmp")
+        self.writer = pq.ParquetWriter(str(self.tmp_path), SCHEMA, compression="zstd")
+        self.pending = {}                     # root -> row dict of the still-open minute
+        self.buf = []
+        self.rows = 0
+
+    def update(self, ts, root_code, feats):
+        """
+        ts: int64 ns per record (arrival order), root_code: index into roots
+        (-1 = ignore), feats: dict of per-record feature arrays.
+        """
+        minute = ts // NS_PER_MIN
+        for code, root in enumerate(self.roots):
+            idx = np.flatnonzero(root_code == code)
+            if not len(idx):
+                continue
+            m = minute[idx]
+            brk  = np.flatnonzero(np.diff(m)) + 1
+            last = np.append(brk - 1, len(m) - 1)               # last record of each minute
+            cnt  = np.diff(np.append(np.insert(brk, 0, 0), len(m)))
+            prev = self.pending.pop(root, None)
+            if prev is not None and prev["minute"] != m[0]:
+                self._emit(prev)
+            elif prev is not None:
+                cnt[0] += prev["n_updates"]                      # same minute continues
+            for j, (li, c) in enumerate(zip(last, cnt)):
+                row = {f: feats[f][idx[li]] for f in self.FEATURES}
+                row.update(minute=m[li], root=root, n_updates=int(c))
+                if j == len(last) - 1:
+                    self.pending[root] = row
+                else:
+                    self._emit(row)
+
+    def _emit(self, row):
+        self.buf.append(row)
+        if len(self.buf) >= self.row_group:
+            self._flush()
+
+    def _flush(self):
+        if not self.buf:
+            return
+        cols = {f: [r[f] for r in self.buf] for f in (*self.FEATURES, "root", "n_updates")}
+        cols["ts_event"] = np.array([r["minute"] for r in self.buf], dtype=np.int64) * NS_PER_MIN
+        self.writer.write_table(pa.table(cols, schema=SCHEMA))
+        self.rows += len(self.buf)
+        self.buf = []
+
+    def close(self):
+        for row in self.pending.values():
+            self.buf.append(row)
+        self.pending = {}
+        self._flush()
+        self.writer.close()
+        # rows were written in arrival order: merge revisited minutes, publish in bar-time order
+        keys = ["ts_event", "root"]
+        tbl = (pq.read_table(self.tmp_path)
+               .group_by(keys, use_threads=False)                # ordered, so "last" = latest
+               .aggregate([(f, "last") for f in self.FEATURES] + [("n_updates", "sum")]))
+        tbl = (tbl.select(keys + [f"{f}_last" for f in self.FEATURES] + ["n_updates_sum"])
+               .rename_columns(SCHEMA.names)
+               .sort_by([(k, "ascending") for k in keys]))
+        pq.write_table(tbl, self.out_path, row_group_size=self.row_group, compression="zstd")
+        self.tmp_path.unlink()
+        self.rows = tbl.num_rows
+        return self.rows
+
+
+def _root_codes(iids, dates, imap, roots):
+    """Map instrument_id (+ date) → index into roots, -1 for anything else."""
+    pairs, inv = np.unique(np.stack([iids.astype(np.int64), dates.astype(np.int64)]),
+                           axis=1, return_inverse=True)
+    pair_codes = np.full(pairs.shape[1], -1, dtype=np.int64)
+    for j, (iid, day) in enumerate(pairs.T):
+        sym = imap.resolve(int(iid), np.datetime64(int(day), "D").item()) or ""
+        if "-" not in sym and sym[:2] in roots:                  # outrights only
+            pair_codes[j] = roots.index(sym[:2])
+    return pair_codes[inv.ravel()]
+
+
+def mbp10_to_minute_parquet(dbn_path, out_path, roots=ROOTS, batch=BATCH):
+    """Stream `dbn_path` into per-minute features at `out_path`; returns rows written."""
+    import databento as db
+    from databento.common.symbology import InstrumentMap
+
+    store = db.DBNStore.from_file(dbn_path)
+    imap = InstrumentMap()
+    imap.insert_metadata(store.metadata)
+    pathlib.Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    agg = BookBarAggregator(out_path, roots)
+    try:
+        for rec in store.to_ndarray(count=batch):
+            ts = rec["ts_event"].astype(np.int64)
+            codes = _root_codes(rec["instrument_id"], ts // (86_400 * 10**9), imap, agg.roots)
+            ok, feats = book_features(rec)
+            codes[~ok] = -1
+            agg.update(ts, codes, feats)
+    finally:
+        rows = agg.close()
+    return rows
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("dbn")
+    ap.add_argument("--out", default="data/processed/ZNZF_mbp10_1m.parquet")
+    ap.add_argument("--batch", type=int, default=BATCH)
+    args = ap.parse_args()
+    rows = mbp10_to_minute_parquet(args.dbn, args.out, batch=args.batch)
+    print(f"✅  wrote {args.out} ({rows:,} minute rows)")
@@ -1,14 +1,62 @@
 import numpy as np
+from utils.jit import njit, HAVE_NUMBA
 
-def ew_z(spread: np.ndarray, k: float = 0.01):
+def ew_init_state():
+    """Initial EW state [mu, var] (matches ew_z)."""
+    return np.array([0.0, 1.0])
+
+@njit(cache=True)
+def _ew_z_loop(spread, k, state, z):
     """
-    Online EW mean/var → z-score. Returns z (n,), plus the running mu, var if needed.
+    EW mean/var recursion over `spread`, writing z into `z`.
+    `state` = [mu, var] is read on entry and overwritten on exit.
     """
-    n   = len(spread)
-    z   = np.empty(n); mu = 0.0; var = 1.0
-    for i in range(n):
+    mu = state[0]; var = state[1]
+    for i in range(len(spread)):
         x   = spread[i]
         mu  = (1 - k) * mu + k * x
         var = (1 - k) * var + k * (x - mu) ** 2
         z[i] = (x - mu) / np.sqrt(var + 1e-9)
+    state[0] = mu; state[1] = var
+
+@njit(cache=True)
+def _ew_z_multi_loop(spread, k, state, z):
+    """`_ew_z_loop` for K series at once: spread (K, n) rows, k (K,), state (K, 2), z (K, n)."""
+    for i in range(spread.shape[1]):
+        for j in range(k.shape[0]):
+            x   = spread[j, i]
+            mu  = (1 - k[j]) * state[j, 0] + k[j] * x
+            var = (1 - k[j]) * state[j, 1] + k[j] * (x - mu) ** 2
+            z[j, i] = (x - mu) / np.sqrt(var + 1e-9)
+            state[j, 0] = mu; state[j, 1] = var
+
+def _ew_z_multi_numpy(spread, k, state, z):
+    """Pure-NumPy fallback for `_ew_z_multi_loop`, vectorized over K."""
+    mu = state[:, 0].copy(); var = state[:, 1].copy()
+    for i in range(spread.shape[1]):
+        x   = spread[:, i]
+        mu  = (1 - k) * mu + k * x
+        var = (1 - k) * var + k * (x - mu) ** 2
+        z[:, i] = (x - mu) / np.sqrt(var + 1e-9)
+    state[:, 0] = mu; state[:, 1] = var
+
+def ew_z(spread: np.ndarray, k=0.01):
+    """
+    Online EW mean/var → z-score. Returns z (n,) for one spread and a scalar
+    decay k; z (len(k), n) for one spread and an array of decays; z (P, n)
+    for P spreads stacked as rows (k scalar or one per row). Every row is
+    computed in the same pass.
+    """
+    spread = np.ascontiguousarray(spread, dtype=float)
+    if spread.ndim == 1 and np.ndim(k) == 0:
+        z = np.empty(len(spread))
+        _ew_z_loop(spread, float(k), ew_init_state(), z)
+        return z
+    rows = np.atleast_2d(spread)
+    K = max(len(rows), np.size(k))
+    k = np.ascontiguousarray(np.broadcast_to(np.asarray(k, dtype=float), (K,)))
+    spread = np.broadcast_to(rows, (K, rows.shape[1]))      # one spread → a row per decay
+    z = np.empty((K, rows.shape[1]))
+    state = np.tile(ew_init_state(), (K, 1))
+    (_ew_z_multi_loop if HAVE_NUMBA else _ew_z_multi_numpy)(spread, k, state, z)
     return z
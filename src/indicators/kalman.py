@@ -1,6 +1,7 @@
 # Kalman, z-score, ATR, etc.
 # ...implementation placeholder...
 import numpy as np
+from utils.jit import njit, HAVE_NUMBA
 
 def kalman_beta_alpha(pa: np.ndarray, pb: np.ndarray,
                       q: float = 1e-4, r: float = 1e-2):
@@ -33,3 +34,146 @@ def kalman_beta_alpha(pa: np.ndarray, pb: np.ndarray,
         beta[t], alpha[t] = x[0], x[1]
 
     return beta, alpha
+
+
+# === Closed-form scalar engine ===============================================
+# Same filter as above, but with H = [b, 1] the 2x2 algebra collapses to a
+# handful of scalar ops: S is a scalar, K = P Hᵀ / S, and the covariance
+# update P ← P − K S Kᵀ keeps P symmetric by construction, so only
+# (P00, P01, P11) are carried.
+
+def kalman_init_state():
+    """Initial filter state [β, α, P00, P01, P11] (matches kalman_beta_alpha)."""
+    return np.array([1.0, 0.0, 1.0, 0.0, 1.0])
+
+
+@njit(cache=True)
+def _kalman_scalar_loop(pa, pb, q, r, state, beta, alpha):
+    """
+    Run the filter over pa/pb, writing β/α into the preallocated outputs.
+    `state` is read on entry and overwritten with the final state on exit.
+    """
+    x0 = state[0]; x1 = state[1]
+    p00 = state[2]; p01 = state[3]; p11 = state[4]
+    for t in range(pa.shape[0]):
+        b = pb[t]
+        # predict
+        p00 += q
+        p11 += q
+        # innovation: h = P Hᵀ, S = H P Hᵀ + R
+        h0 = p00 * b + p01
+        h1 = p01 * b + p11
+        s  = b * h0 + h1 + r
+        y  = pa[t] - (b * x0 + x1)
+        # update
+        k0 = h0 / s
+        k1 = h1 / s
+        x0 += k0 * y
+        x1 += k1 * y
+        p00 -= k0 * h0
+        p01 -= k0 * h1
+        p11 -= k1 * h1
+        beta[t] = x0
+        alpha[t] = x1
+    state[0] = x0; state[1] = x1
+    state[2] = p00; state[3] = p01; state[4] = p11
+
+
+def kalman_beta_alpha_fast(pa: np.ndarray, pb: np.ndarray,
+                           q: float = 1e-4, r: float = 1e-2):
+    """
+    Closed-form scalar version of `kalman_beta_alpha` (compiled when numba
+    is available). Returns two np.ndarray of shape (n,): beta, alpha.
+    """
+    pa = np.ascontiguousarray(pa, dtype=float)
+    pb = np.ascontiguousarray(pb, dtype=float)
+    n = len(pa)
+    beta = np.empty(n); alpha = np.empty(n)
+    _kalman_scalar_loop(pa, pb, float(q), float(r), kalman_init_state(), beta, alpha)
+    return beta, alpha
+
+
+# === Batched (q, r) grid =====================================================
+# K independent filters share one pass over the prices. Rows of `state` are
+# [β, α, P00, P01, P11] per filter. With `store=False` nothing of length n is
+# written and only the innovation log-likelihood is accumulated, which is
+# what a noise-parameter search usually wants.
+
+@njit(cache=True)
+def _kalman_grid_loop(pa, pb, q, r, state, beta, alpha, loglik, store):
+    K = q.shape[0]
+    for t in range(pa.shape[0]):
+        a_t = pa[t]; b = pb[t]
+        for k in range(K):
+            x0 = state[k, 0]; x1 = state[k, 1]
+            p00 = state[k, 2] + q[k]; p01 = state[k, 3]; p11 = state[k, 4] + q[k]
+            h0 = p00 * b + p01
+            h1 = p01 * b + p11
+            s  = b * h0 + h1 + r[k]
+            y  = a_t - (b * x0 + x1)
+            k0 = h0 / s
+            k1 = h1 / s
+            x0 += k0 * y
+            x1 += k1 * y
+            state[k, 0] = x0; state[k, 1] = x1
+            state[k, 2] = p00 - k0 * h0
+            state[k, 3] = p01 - k0 * h1
+            state[k, 4] = p11 - k1 * h1
+            loglik[k] -= 0.5 * (np.log(2.0 * np.pi * s) + y * y / s)
+            if store:
+                beta[k, t] = x0
+                alpha[k, t] = x1
+
+
+def _kalman_grid_numpy(pa, pb, q, r, state, beta, alpha, loglik, store):
+    """Pure-NumPy fallback for `_kalman_grid_loop`, vectorized over K."""
+    x0, x1, p00, p01, p11 = (state[:, j].copy() for j in range(5))
+    for t in range(pa.shape[0]):
+        b = pb[t]
+        p00 += q; p11 += q
+        h0 = p00 * b + p01
+        h1 = p01 * b + p11
+        s  = b * h0 + h1 + r
+        y  = pa[t] - (b * x0 + x1)
+        k0 = h0 / s; k1 = h1 / s
+        x0 += k0 * y; x1 += k1 * y
+        p00 -= k0 * h0; p01 -= k0 * h1; p11 -= k1 * h1
+        loglik -= 0.5 * (np.log(2.0 * np.pi * s) + y * y / s)
+        if store:
+            beta[:, t] = x0; alpha[:, t] = x1
+    state[:] = np.column_stack([x0, x1, p00, p01, p11])
+
+
+def _run_grid(pa, pb, q, r, store):
+    pa = np.ascontiguousarray(pa, dtype=float)
+    pb = np.ascontiguousarray(pb, dtype=float)
+    q, r = np.broadcast_arrays(np.atleast_1d(np.asarray(q, dtype=float)),
+                               np.atleast_1d(np.asarray(r, dtype=float)))
+    q = np.ascontiguousarray(q); r = np.ascontiguousarray(r)
+    K, n = len(q), len(pa)
+    state  = np.tile(kalman_init_state(), (K, 1))
+    shape  = (K, n) if store else (K, 0)
+    beta   = np.empty(shape); alpha = np.empty(shape)
+    loglik = np.zeros(K)
+    loop = _kalman_grid_loop if HAVE_NUMBA else _kalman_grid_numpy
+    loop(pa, pb, q, r, state, beta, alpha, loglik, store)
+    return beta, alpha, loglik
+
+
+def kalman_beta_alpha_grid(pa: np.ndarray, pb: np.ndarray, q, r):
+    """
+    Run K filters with noise pairs (q[k], r[k]) in one pass. q and r are
+    broadcast against each other, so a scalar r with an array of q works.
+    Returns beta, alpha of shape (K, n); row k equals
+    kalman_beta_alpha_fast(pa, pb, q[k], r[k]).
+    """
+    beta, alpha, _ = _run_grid(pa, pb, q, r, store=True)
+    return beta, alpha
+
+
+def kalman_loglik_grid(pa: np.ndarray, pb: np.ndarray, q, r):
+    """
+    Streaming reduction of `kalman_beta_alpha_grid`: Gaussian log-likelihood
+    of the innovations for each (q, r) pair, shape (K,), in O(K) memory.
+    """
+    return _run_grid(pa, pb, q, r, store=False)[2]
@@ -0,0 +1,97 @@
+"""
+Incremental Kalman β/α → spread → EW z-score.
+
+SignalState carries the filter state between calls, so bars can be fed one
+at a time or in micro-batches and a job can resume from a checkpoint:
+
+    st = SignalState.from_bytes(path.read_bytes())
+    beta, alpha, spread, z = st.update(pa_today, pb_today)
+    path.write_bytes(st.to_bytes())
+
+Feeding a series in any chunking gives bit-identical output to
+kalman_beta_alpha_fast + ew_z on the full arrays.
+"""
+import struct
+import numpy as np
+from dataclasses import dataclass, field
+from utils.jit import njit
+from indicators.kalman import _kalman_scalar_loop, kalman_init_state
+from indicators.ewstats import _ew_z_loop, ew_init_state
+
+_MAGIC   = b"SGS1"
+_LAYOUT  = struct.Struct("<4s3d5d2dq")       # magic, q r k, Kalman state, EW state, bars seen
+
+
+@njit(cache=True)
+def _signal_step(pa, pb, q, r, k, kal, ew):
+    """
+    One bar of _kalman_scalar_loop + spread + _ew_z_loop on scalars, with the
+    same operations in the same order (bit-identical), no arrays allocated.
+    """
+    x0 = kal[0]; x1 = kal[1]
+    p00 = kal[2] + q; p01 = kal[3]; p11 = kal[4] + q
+    h0 = p00 * pb + p01
+    h1 = p01 * pb + p11
+    s  = pb * h0 + h1 + r
+    y  = pa - (pb * x0 + x1)
+    k0 = h0 / s
+    k1 = h1 / s
+    x0 += k0 * y
+    x1 += k1 * y
+    kal[0] = x0; kal[1] = x1
+    kal[2] = p00 - k0 * h0; kal[3] = p01 - k0 * h1; kal[4] = p11 - k1 * h1
+    spread = pa - x0*pb - x1
+    mu  = (1 - k) * ew[0] + k * spread
+    var = (1 - k) * ew[1] + k * (spread - mu) ** 2
+    ew[0] = mu; ew[1] = var
+    return x0, x1, spread, (spread - mu) / np.sqrt(var + 1e-9)
+
+
+@dataclass
+class SignalState:
+    q: float = 1e-4                          # Kalman state noise
+    r: float = 1e-2                          # Kalman observation noise
+    k: float = 0.01                          # EW decay
+    kalman: np.ndarray = field(default_factory=kalman_init_state)   # [β, α, P00, P01, P11]
+    ew: np.ndarray = field(default_factory=ew_init_state)           # [mu, var]
+    n_bars: int = 0
+
+    def update(self, pa, pb):
+        """
+        Advance by one bar (scalars) or a micro-batch (arrays).
+        Returns beta, alpha, spread, z with the same shape as the input.
+        """
+        scalar = np.ndim(pa) == 0
+        pa = np.ascontiguousarray(np.atleast_1d(pa), dtype=float)
+        pb = np.ascontiguousarray(np.atleast_1d(pb), dtype=float)
+        n = len(pa)
+        beta = np.empty(n); alpha = np.empty(n); z = np.empty(n)
+        _kalman_scalar_loop(pa, pb, float(self.q), float(self.r), self.kalman, beta, alpha)
+        spread = pa - beta*pb - alpha
+        _ew_z_loop(spread, float(self.k), self.ew, z)
+        self.n_bars += n
+        if scalar:
+            return beta[0], alpha[0], spread[0], z[0]
+        return beta, alpha, spread, z
+
+    def step(self, pa: float, pb: float):
+        """
+        Fast path for a single live bar: same result as update() on scalars,
+        computed in one compiled call without temporary arrays.
+        """
+        self.n_bars += 1
+        return _signal_step(float(pa), float(pb), self.q, self.r, self.k, self.kalman, self.ew)
+
+    # ---- checkpointing ------------------------------------------------------
+    def to_bytes(self) -> bytes:
+        return _LAYOUT.pack(_MAGIC, self.q, self.r, self.k,
+                            *self.kalman, *self.ew, self.n_bars)
+
+    @classmethod
+    def from_bytes(cls, buf: bytes) -> "SignalState":
+        vals = _LAYOUT.unpack(buf)
+        if vals[0] != _MAGIC:
+            raise ValueError("not a SignalState checkpoint")
+        q, r, k = vals[1:4]
+        return cls(q=q, r=r, k=k, kalman=np.array(vals[4:9]),
+                   ew=np.array(vals[9:11]), n_bars=vals[11])
@@ -0,0 +1,53 @@
+"""
+Simulated broker for paper trading.
+
+Orders are target positions filled at the bar close they were decided on,
+which is what PairBacktester assumes. Marking to market uses the engine's
+tick arithmetic and bad-tick guard, so a replay books the same PnL as the
+backtest, bar for bar.
+"""
+from dataclasses import dataclass
+from backtest.engine import TICK_ZN, TICK_ZF, TICKVAL_ZN, TICKVAL_ZF, MAX_POINT_JUMP
+
+
+@dataclass(slots=True)
+class Fill:
+    ts: int
+    dqA: int                             # contracts bought (+) / sold (−)
+    dqB: int
+    pa: float
+    pb: float
+    cost: float
+
+
+class SimBroker:
+    def __init__(self, cost_per_entry=0.0, cost_per_exit=0.0):
+        self.cost_per_entry = cost_per_entry
+        self.cost_per_exit = cost_per_exit
+        self.qA = self.qB = 0
+        self.equity = 0.0
+        self.fills = []
+        self._pa = self._pb = None
+
+    def mark(self, pa, pb):
+        """Book PnL of the held position from the previous close to this one."""
+        if self._pa is not None and (self.qA or self.qB):
+            da = pa - self._pa
+            db = pb - self._pb
+            if abs(da) <= MAX_POINT_JUMP and abs(db) <= MAX_POINT_JUMP:
+                tick_a = da / TICK_ZN
+                tick_b = db / TICK_ZF
+                self.equity = self.equity + self.qA * tick_a * TICKVAL_ZN + self.qB * tick_b * TICKVAL_ZF
+        self._pa, self._pb = pa, pb
+
+    def execute(self, ts, pa, pb, qA, qB, exited, entered):
+        """Move to target (qA, qB) at (pa, pb), charging the exit then the entry cost."""
+        cost = 0.0
+        if exited:
+            self.equity -= self.cost_per_exit
+            cost += self.cost_per_exit
+        if entered:
+            self.equity -= self.cost_per_entry
+            cost += self.cost_per_entry
+        self.fills.append(Fill(ts, qA - self.qA, qB - self.qB, pa, pb, cost))
+        self.qA, self.qB = qA, qB
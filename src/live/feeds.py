@@ -0,0 +1,92 @@
+"""
+Bar event sources for the live/paper runtime.
+
+A feed is anything with an `events()` async generator yielding Bar. Bars
+are stamped with `recv_ns` (time.perf_counter_ns) when handed to the
+consumer, so the runtime can measure event-to-decision latency.
+
+• ArrayFeed – replays in-memory arrays, as fast as possible or paced by
+  the bar timestamps (`speed` × real time)
+• ParquetReplayFeed – ArrayFeed over the processed dataset via load_bars;
+  point `dataset`/`columns` at pivoted MBP-10 microprices to replay book
+  features instead of closes
+• SocketFeed – newline-delimited "ts_ns,pa,pb" over TCP; serve_bars() is
+  the matching local stand-in for a market-data gateway
+"""
+import asyncio, time
+from dataclasses import dataclass
+import numpy as np
+
+YIELD_EVERY = 1024                       # bars between event-loop yields at full speed
+
+
+@dataclass(slots=True)
+class Bar:
+    ts: int                              # event time, ns since epoch (UTC)
+    pa: float                            # leg A (ZN) price
+    pb: float                            # leg B (ZF) price
+    recv_ns: int = 0                     # perf_counter_ns when delivered
+
+
+class ArrayFeed:
+    def __init__(self, ts, a, b, speed=None, yield_every=YIELD_EVERY):
+        self.ts = np.asarray(ts).astype("datetime64[ns]").view(np.int64)
+        self.a = np.asarray(a, dtype=float)
+        self.b = np.asarray(b, dtype=float)
+        self.speed = speed
+        self.yield_every = yield_every
+
+    async def events(self):
+        clock = time.perf_counter_ns
+        ts, a, b = self.ts.tolist(), self.a.tolist(), self.b.tolist()   # Python floats: no per-bar boxing
+        for i in range(len(ts)):
+            if self.speed:
+                if i:
+                    await asyncio.sleep((ts[i] - ts[i-1]) / 1e9 / self.speed)
+            elif i % self.yield_every == 0:
+                await asyncio.sleep(0)
+            yield Bar(ts[i], a[i], b[i], clock())
+
+
+class ParquetReplayFeed(ArrayFeed):
+    def __init__(self, dataset=None, start=None, end=None, columns=("ZN", "ZF"),
+                 speed=None, **load_kw):
+        from dbload.bars import load_bars, DATASET
+        bars = load_bars(dataset or DATASET, start=start, end=end, columns=columns, **load_kw)
+        super().__init__(bars.ts, bars[columns[0]], bars[columns[1]], speed)
+
+
+class SocketFeed:
+    def __init__(self, host="127.0.0.1", port=9009):
+        self.host, self.port = host, port
+
+    async def events(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        clock = time.perf_counter_ns
+        try:
+            while line := await reader.readline():
+                ts, pa, pb = line.split(b",")
+                yield Bar(int(ts), float(pa), float(pb), clock())
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+
+async def serve_bars(ts, a, b, host="127.0.0.1", port=0):
+    """
+    Local TCP stand-in for a live feed: every client that connects gets the
+    whole series as "ts_ns,pa,pb" lines, then EOF. Returns the asyncio
+    Server; its bound port is server.sockets[0].getsockname()[1].
+    """
+    feed = ArrayFeed(ts, a, b)
+    lines = [f"{t},{x!r},{y!r}\n".encode() for t, x, y in
+             zip(feed.ts.tolist(), feed.a.tolist(), feed.b.tolist())]
+
+    async def handle(reader, writer):
+        for i in range(0, len(lines), YIELD_EVERY):
+            writer.write(b"".join(lines[i:i + YIELD_EVERY]))
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    return await asyncio.start_server(handle, host, port)
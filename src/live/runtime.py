@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Event-driven paper-trading runtime for the ZN/ZF pair.
+
+For every bar from a feed (live/feeds.py) PairTrader advances the Kalman
+β/α and EW z-score by one step (SignalState.step, a single compiled call),
+marks the SimBroker, applies MeanRevertRules (the PairBacktester rules) and
+sends any new target position to the broker. Two latency histograms are
+kept: "decision" (signal update → order, pure compute) and "event" (feed
+hand-off → order, including the event-loop hop).
+
+    python src/live/runtime.py --start 2024-01-01 --warmup-start 2023-01-01
+"""
+import argparse, asyncio, math, time
+from datetime import datetime, timezone
+from backtest.engine import Params
+from indicators.stream import SignalState
+from strategy.meanrevert import MeanRevertRules
+from live.broker import SimBroker
+
+UTC = timezone.utc
+
+
+class LatencyHistogram:
+    """Log-bucketed ns histogram (8 buckets per octave, ≤ 9% bucket width)."""
+    PER_OCTAVE = 8
+
+    def __init__(self):
+        self.counts = [0] * (64 * self.PER_OCTAVE)
+        self.n = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.counts[int(math.log2(ns) * self.PER_OCTAVE) if ns > 0 else 0] += 1
+        self.n += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        """Upper edge (ns) of the bucket holding the q-th percentile."""
+        if not self.n:
+            return 0.0
+        target, seen = q / 100 * self.n, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= target:
+                return min(2 ** ((i + 1) / self.PER_OCTAVE), self.max)
+        return float(self.max)
+
+    def summary(self):
+        return dict(n=self.n, mean_us=self.total / max(self.n, 1) / 1e3,
+                    **{f"p{q:g}_us": self.percentile(q) / 1e3 for q in (50, 90, 99, 99.9)},
+                    max_us=self.max / 1e3)
+
+
+class PairTrader:
+    def __init__(self, feed, signals: SignalState, rules: MeanRevertRules,
+                 broker: SimBroker, trace=False):
+        self.feed = feed
+        self.signals = signals
+        self.rules = rules
+        self.broker = broker
+        self.latency = {"decision": LatencyHistogram(), "event": LatencyHistogram()}
+        self.trace = [] if trace else None           # per-bar (qA, qB, equity) for checks
+
+    def warm(self):
+        """Load the compiled signal step outside the timed loop (throwaway state)."""
+        SignalState(self.signals.q, self.signals.r, self.signals.k).step(1.0, 1.0)
+
+    async def run(self):
+        self.warm()
+        clock = time.perf_counter_ns
+        step, mark, on_bar = self.signals.step, self.broker.mark, self.rules.on_bar
+        broker = self.broker
+        dec, evt = self.latency["decision"].record, self.latency["event"].record
+        async for bar in self.feed.events():
+            t0 = clock()
+            beta, alpha, spread, z = step(bar.pa, bar.pb)
+            mark(bar.pa, bar.pb)
+            held = (broker.qA, broker.qB)
+            order = on_bar(bar.pa, bar.pb, beta, z)
+            if order is not None:
+                broker.execute(bar.ts, bar.pa, bar.pb, *order)
+            t1 = clock()
+            dec(t1 - t0)
+            evt(t1 - bar.recv_ns)
+            if self.trace is not None:
+                self.trace.append((*held, broker.equity))
+        return self.report()
+
+    def report(self):
+        return dict(bars=self.signals.n_bars, fills=len(self.broker.fills),
+                    equity=self.broker.equity,
+                    latency={k: h.summary() for k, h in self.latency.items()})
+
+
+def paper_trader(feed, params: Params = Params(), signals: SignalState = None, trace=False):
+    """PairTrader with fresh rules/broker for `params` (costs from params too)."""
+    return PairTrader(feed, signals or SignalState(), MeanRevertRules(params),
+                      SimBroker(params.cost_per_entry, params.cost_per_exit), trace)
+
+
+if __name__ == "__main__":
+    from dbload.bars import load_bars
+    from pipeline.signals import DATASET, KALMAN_Q, KALMAN_R, EW_K
+    from pipeline.sweep import HALF_TICK_COST
+    from live.feeds import ArrayFeed
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--dataset", default=DATASET)
+    ap.add_argument("--start", default="2024-01-01")
+    ap.add_argument("--end", default=None)
+    ap.add_argument("--warmup-start", default=None,
+                    help="bars from here to --start only train the filters")
+    ap.add_argument("--entry", type=float, default=Params.entry_z)
+    ap.add_argument("--exit", type=float, default=Params.exit_z)
+    ap.add_argument("--speed", type=float, default=None,
+                    help="replay at N× real time (default: as fast as possible)")
+    args = ap.parse_args()
+
+    day = lambda s: datetime.fromisoformat(s).replace(tzinfo=UTC) if s else None
+    start = day(args.start)
+    bars = load_bars(args.dataset, start=day(args.warmup_start) or start, end=day(args.end))
+    warm, live = bars.split(start)
+    signals = SignalState(q=KALMAN_Q, r=KALMAN_R, k=EW_K)
+    if len(warm):
+        signals.update(warm["ZN"], warm["ZF"])           # batch warm-up
+    params = Params(entry_z=args.entry, exit_z=args.exit,
+                    cost_per_entry=HALF_TICK_COST, cost_per_exit=HALF_TICK_COST)
+    trader = paper_trader(ArrayFeed(live.ts, live["ZN"], live["ZF"], args.speed), params, signals)
+    rep = asyncio.run(trader.run())
+    print(f"bars {len(live):,} (warm-up {len(warm):,})  fills {rep['fills']}  "
+          f"PnL ${rep['equity']:,.0f}")
+    for name, s in rep["latency"].items():
+        print(f"{name:9s} p50 {s['p50_us']:6.1f}µs  p99 {s['p99_us']:6.1f}µs  "
+              f"p99.9 {s['p99.9_us']:6.1f}µs  max {s['max_us']:8.1f}µs")
@@ -1,115 +1,139 @@
-import polars as pl, numpy as np
-from datetime import time, datetime, timezone
-from indicators.kalman import kalman_beta_alpha
-from indicators.ewstats import ew_z
-from backtest.engine import PairBacktester, Params
-from backtest.metrics import sharpe, drawdown, turnover
+from datetime import datetime, timezone
+from dbload.bars import RTH
+from pipeline.signals import signal_bars, DATASET, KALMAN_Q, KALMAN_R, EW_K
+from backtest.engine import PairBacktester
 import matplotlib.pyplot as plt
-from backtest.viz_mpl import save_equity_bars_png, save_equity_combined_png
-import pandas as pd
-import pathlib
-from datetime import datetime
+from backtest.viz_mpl import save_equity_bars_png, save_equity_combined_png, render_parallel
+import argparse, pathlib, os
+from pipeline.sweep import SharedArrays, parallel_sweep, entry_exit_grid, FIELDS
+from utils.profiling import StageTimer
+from backtest.significance import significance_report, describe
 
 UTC  = timezone.utc
 CUT1 = datetime(2023, 1, 1, tzinfo=UTC)
 CUT2 = datetime(2024, 1, 1, tzinfo=UTC)
 
-# ---------- Load & filter to RTH (UTC 13:20–20:30) --------------------------
-df = pl.read_parquet("data/processed/ZNZF_1m.parquet").sort("ts_event")
-
-df = df.with_columns([
-    pl.col("ts_event").alias("dt"),
-    pl.col("ts_event").dt.time().alias("tod")
-]).filter(
-    (pl.col("tod") >= time(13,20)) & (pl.col("tod") <= time(20,30))
-).drop("tod")
-
-# ---------- Compute online β/α, spread, z -----------------------------------
-a = df["ZN"].to_numpy()
-b = df["ZF"].to_numpy()
-beta, alpha = kalman_beta_alpha(a, b, q=1e-4, r=1e-2)
-spread = a - beta*b - alpha
-z = ew_z(spread, k=0.01)
-
-df = df.with_columns([
-    pl.Series("beta", beta),
-    pl.Series("alpha", alpha),
-    pl.Series("spread", spread),
-    pl.Series("z", z),
-])
-
-# ---------- Define splits ----------------------------------------------------
-# Train: 2018-01-02 .. 2022-12-31
-# Test : 2023-01-02 .. 2023-12-31
-# Valid: 2024-01-02 .. 2024-12-31
-train = df.filter(pl.col("dt") < CUT1)
-test  = df.filter((pl.col("dt") >= CUT1) & (pl.col("dt") < CUT2))
-valid = df.filter(pl.col("dt") >= CUT2)
+PairBacktester.backend = "numba"   # compiled event loop; "python" is the reference
+
 
 def run_segment(seg, params):
-    arr = seg.select(["ZN","ZF","beta","alpha","z","dt"]).to_dict(as_series=False)
-    bt  = PairBacktester(
-            np.array(arr["ZN"]), np.array(arr["ZF"]),
-            np.array(arr["beta"]), np.array(arr["alpha"]),
-            np.array(arr["z"]),   np.array(arr["dt"]), params
-          )
-    out = bt.run()
-    pnl = out["pnl"]
-    daily = pd.Series(np.diff(pnl), index=seg["dt"].to_pandas()[1:]).resample("D").sum()
+    bt  = PairBacktester(seg["ZN"], seg["ZF"], seg["beta"], seg["alpha"],
+                         seg["z"], seg.ts, params)
+    out = bt.run(metrics=True)                # metrics accumulated inside the loop
+    m   = out["metrics"]
     print("Daily PnL  [min/mean/max]:",
-      f"${daily.min():,.0f} / ${daily.mean():,.0f} / ${daily.max():,.0f}")
-    ret = np.diff(pnl)
-    S   = sharpe(ret)
-    mdd, _ = drawdown(pnl)
-    trn = turnover(out["posA"], out["posB"])
-    return S, mdd, trn, pnl
-
-# ---------- Grid search ENTRY/EXIT on train ---------------------------------
-best = None
-for entry in np.arange(1.5, 3.05, 0.25):
-    for exit_ in np.arange(0.2, 0.55, 0.1):
-        p = Params(entry_z=float(entry), exit_z=float(exit_), stop_z=5.0,
-                   time_stop_bars=360, budget_usd=250_000,
-                   cost_per_entry= (15.625 + 7.8125)*0.5,   # ~½ tick per leg
-                   cost_per_exit = (15.625 + 7.8125)*0.5)
-        S, mdd, trn, pnl = run_segment(train, p)
-        score = S
+      f"${m['daily_min']:,.0f} / ${m['daily_mean']:,.0f} / ${m['daily_max']:,.0f}")
+    return m["sharpe"], m["max_dd"], m["turnover"], out["pnl"]
+
+
+def grid_search(train, workers=None):
+    """Grid search ENTRY/EXIT on train; returns the best-Sharpe row."""
+    grid = entry_exit_grid()                         # 7 entries × 4 exits
+    cols = dict(zip(FIELDS, [*(train[c] for c in ["ZN","ZF","beta","alpha","z"]), train.ts]))
+    with SharedArrays(**cols) as shm:                # workers get Params only
+        rows = parallel_sweep(shm, grid, workers=workers or os.cpu_count())
+
+    best = None
+    for p, row in zip(grid, rows):
+        print(f"  e={p.entry_z:.2f} x={p.exit_z:.2f}  Sharpe {row['sharpe']:6.2f}  "
+              f"MaxDD ${row['max_dd']:,.0f}  trades {row['turnover']}")
+        score = row["sharpe"]
         if best is None or score > best["score"]:
-            best = dict(score=score, entry=entry, exit=exit_, params=p)
-print("Best TRAIN:", best)
-
-# ---------- Evaluate on TEST and VALID with fixed params --------------------
-S_train, mdd_train, trn_train, pnl_train = run_segment(train, best["params"])
-S_test,  mdd_test,  trn_test,  pnl_test  = run_segment(test,  best["params"])
-S_val,   mdd_val,   trn_val,   pnl_val   = run_segment(valid, best["params"])
-
-print(f"Sharpe  — train {S_train:.2f} | test {S_test:.2f} | valid {S_val:.2f}")
-print(f"MaxDD $ — train {mdd_train:,.0f} | test {mdd_test:,.0f} | valid {mdd_val:,.0f}")
-print(f"Trades  — train {trn_train} | test {trn_test} | valid {trn_val}")
-
-# ---- create run folder ----
-stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-desc  = f"ZNZF_kalman_e{best['params'].entry_z}_x{best['params'].exit_z}"
-run_dir   = pathlib.Path("results") / f"{stamp}__{desc}"
-plots_dir = run_dir / "plots"
-plots_dir.mkdir(parents=True, exist_ok=True)
-
-plots_dir = pathlib.Path(run_dir) / "plots"
-plots_dir.mkdir(parents=True, exist_ok=True)
-
-# Combined equity line
-save_equity_combined_png(
-    train["dt"].to_pandas(), pnl_train,
-    test["dt"].to_pandas(),  pnl_test,
-    valid["dt"].to_pandas(), pnl_val,
-    plots_dir / "equity_combined.png",
-)
-
-# QC-style green/red bars + equity (daily)
-save_equity_bars_png(train["dt"].to_pandas(), pnl_train, plots_dir / "train_equity.png",
-                     freq="D", title="Train — Equity & Daily PnL")
-save_equity_bars_png(test["dt"].to_pandas(),  pnl_test,  plots_dir / "test_equity.png",
-                     freq="D", title="Test — Equity & Daily PnL")
-save_equity_bars_png(valid["dt"].to_pandas(), pnl_val,   plots_dir / "valid_equity.png",
-                     freq="D", title="Validation — Equity & Daily PnL")
-print("Saved Matplotlib PNGs to:", plots_dir)
+            best = dict(score=score, entry=p.entry_z, exit=p.exit_z, params=p)
+    print("Best TRAIN:", best)
+    return best
+
+
+def save_plots(plots_dir, segments, workers=None):
+    (train, pnl_train), (test, pnl_test), (valid, pnl_val) = segments
+    jobs = [
+        # Combined equity line
+        (save_equity_combined_png,
+         (train.ts, pnl_train, test.ts, pnl_test, valid.ts, pnl_val,
+          plots_dir / "equity_combined.png"), {}),
+        # QC-style green/red bars + equity (daily)
+        (save_equity_bars_png, (train.ts, pnl_train, plots_dir / "train_equity.png"),
+         dict(freq="D", title="Train — Equity & Daily PnL")),
+        (save_equity_bars_png, (test.ts, pnl_test, plots_dir / "test_equity.png"),
+         dict(freq="D", title="Test — Equity & Daily PnL")),
+        (save_equity_bars_png, (valid.ts, pnl_val, plots_dir / "valid_equity.png"),
+         dict(freq="D", title="Validation — Equity & Daily PnL")),
+    ]
+    render_parallel(jobs, workers)                   # one figure per process
+    print("Saved Matplotlib PNGs to:", plots_dir)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ZN/ZF Kalman pair backtest: train grid search, test/valid evaluation")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--profile", action="store_true",
+                    help="run each top-level stage under cProfile (stats in <run>/profile/;"
+                         " nested stages appear inside their parent's profile)")
+    ap.add_argument("--sample-ms", type=float, default=0,
+                    help="sample the main thread's stack every N ms; hot frames go in the report")
+    ap.add_argument("--boot", type=int, default=0,
+                    help="Reality Check / deflated Sharpe of the train grid with N bootstrap "
+                         "replays; holds two (train bars × grid) float64 matrices, "
+                         "~450 MB per million train bars for the 28-point grid")
+    ap.add_argument("--shifts", type=int, default=0,
+                    help="also N randomized-signal (shifted z) grid replays; one train-length "
+                         "grid equity matrix per worker at a time")
+    args = ap.parse_args(argv)
+    timer = StageTimer(profile=args.profile, sample_ms=args.sample_ms)
+
+    # ---------- RTH bars (UTC 13:20–20:30) + online β/α, spread, z ----------
+    with timer.stage("signals") as st:
+        bars = signal_bars(DATASET, session=RTH, q=KALMAN_Q, r=KALMAN_R, k=EW_K,
+                           timer=timer)                       # mmap-cached
+        st.rows = len(bars)
+
+    # ---------- Define splits ------------------------------------------------
+    # Train: 2018-01-02 .. 2022-12-31
+    # Test : 2023-01-02 .. 2023-12-31
+    # Valid: 2024-01-02 .. 2024-12-31
+    with timer.stage("split") as st:
+        train, test, valid = bars.split(CUT1, CUT2)    # views, no copies
+        st.rows = len(bars)
+
+    with timer.stage("grid_search") as st:
+        best = grid_search(train, args.workers)
+        st.rows = len(train) * len(entry_exit_grid())
+
+    if args.boot or args.shifts:
+        with timer.stage("significance") as st:
+            grid = entry_exit_grid()
+            cols = dict(zip(FIELDS, [*(train[c] for c in ["ZN","ZF","beta","alpha","z"]), train.ts]))
+            sig = significance_report(cols, grid, args.boot, args.shifts, workers=args.workers)
+            print("Data snooping —", describe(sig))
+            st.rows = len(train) * len(grid) * (1 + args.shifts)
+
+    # ---------- Evaluate on TEST and VALID with fixed params ----------------
+    with timer.stage("evaluate") as st:
+        S_train, mdd_train, trn_train, pnl_train = run_segment(train, best["params"])
+        S_test,  mdd_test,  trn_test,  pnl_test  = run_segment(test,  best["params"])
+        S_val,   mdd_val,   trn_val,   pnl_val   = run_segment(valid, best["params"])
+        st.rows = len(train) + len(test) + len(valid)
+
+    print(f"Sharpe  — train {S_train:.2f} | test {S_test:.2f} | valid {S_val:.2f}")
+    print(f"MaxDD $ — train {mdd_train:,.0f} | test {mdd_test:,.0f} | valid {mdd_val:,.0f}")
+    print(f"Trades  — train {trn_train} | test {trn_test} | valid {trn_val}")
+
+    # ---- create run folder ----
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    desc  = f"ZNZF_kalman_e{best['params'].entry_z}_x{best['params'].exit_z}"
+    run_dir   = pathlib.Path("results") / f"{stamp}__{desc}"
+    plots_dir = run_dir / "plots"
+    plots_dir.mkdir(parents=True, exist_ok=True)
+
+    with timer.stage("plots") as st:
+        save_plots(plots_dir, [(train, pnl_train), (test, pnl_test), (valid, pnl_val)],
+                   args.workers)
+        st.rows = len(train) + len(test) + len(valid)
+
+    print(timer.summary())
+    print("Saved timings to:", timer.write(run_dir / "timings.json"))
+    return run_dir
+
+
+if __name__ == "__main__":
+    main()
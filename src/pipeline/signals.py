@@ -0,0 +1,61 @@
+"""
+RTH bars + online β/α, spread and z-score for the whole history, computed
+once and served from the memory-mapped BarCache on later calls. Every
+consumer (run_backtest, walk-forward, sweeps) slices this one set of arrays.
+"""
+import pathlib
+import numpy as np
+from dbload.bars import load_bars, RTH
+from dbload.cache import BarCache, cache_key
+from indicators.kalman import kalman_beta_alpha_fast
+from indicators.ewstats import ew_z
+from utils.profiling import stage
+
+DATASET  = "data/processed/ZNZF_1m"
+KALMAN_Q = 1e-4                    # Kalman state noise; tune with kalman_loglik_grid
+KALMAN_R = 1e-2                    # Kalman observation noise
+EW_K     = 0.01                    # z-score EW decay
+
+
+def build_signal_bars(dataset=DATASET, session=RTH, q=KALMAN_Q, r=KALMAN_R, k=EW_K,
+                      timer=None):
+    """`timer` (utils.profiling.StageTimer, optional) gets load/kalman/zscore stages."""
+    with stage(timer, "load") as st:
+        bars = load_bars(dataset, session=session)   # filter pushed into the scan
+        st.rows = len(bars)
+    a = bars["ZN"]
+    b = bars["ZF"]
+    with stage(timer, "kalman") as st:
+        beta, alpha = kalman_beta_alpha_fast(a, b, q=q, r=r)
+        st.rows = len(a)
+    with stage(timer, "zscore") as st:
+        spread = a - beta*b - alpha
+        z = ew_z(spread, k=k)
+        st.rows = len(a)
+    return bars.with_columns(beta=beta, alpha=alpha, spread=spread, z=z)
+
+
+def signal_bars(dataset=DATASET, session=RTH, q=KALMAN_Q, r=KALMAN_R, k=EW_K,
+                cache: BarCache = None, timer=None):
+    """Cached `build_signal_bars`; pass cache=False to always recompute."""
+    if cache is False:
+        return build_signal_bars(dataset, session, q, r, k, timer)
+    sources = sorted(pathlib.Path(dataset).rglob("*.parquet"))
+    key = cache_key(sources, session=session, q=q, r=r, k=k)
+    return (cache or BarCache()).get_or_build(
+        key, lambda: build_signal_bars(dataset, session, q, r, k, timer))
+
+
+def curve_signals(bars, pairs, q=KALMAN_Q, r=KALMAN_R, k=EW_K):
+    """
+    (beta, z) of shape (n, P) for PortfolioBacktester: a Kalman pass per
+    (root_a, root_b) pair over columns of `bars`, then the z of all P
+    spreads in one multi-row ew_z pass.
+    """
+    beta = np.empty((len(pairs), len(bars)))
+    spread = np.empty_like(beta)
+    for p, (ra, rb) in enumerate(pairs):
+        a, b = bars[ra], bars[rb]
+        beta[p], alpha = kalman_beta_alpha_fast(a, b, q=q, r=r)
+        spread[p] = a - beta[p]*b - alpha
+    return beta.T, ew_z(spread, k=k).T
@@ -0,0 +1,126 @@
+"""
+Process-pool parameter sweep over shared-memory market data.
+
+The ZN/ZF/β/α/z/ts arrays are copied once into `multiprocessing.shared_memory`
+blocks; each worker attaches to them in its initializer, so the only thing
+pickled per task is a `Params` object (and a small metrics dict back).
+
+    with SharedArrays(a=a, b=b, beta=beta, alpha=alpha, z=z, ts=ts) as shm:
+        rows = parallel_sweep(shm, grid, workers=32)
+"""
+import os, sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from backtest.engine import PairBacktester, Params, TICKVAL_ZN, TICKVAL_ZF
+
+FIELDS = ("a", "b", "beta", "alpha", "z", "ts")
+HALF_TICK_COST = (TICKVAL_ZN + TICKVAL_ZF) * 0.5     # ~½ tick per leg, $ per spread entry/exit
+
+
+def entry_exit_grid(entries=np.arange(1.5, 3.05, 0.25), exits=np.arange(0.2, 0.55, 0.1),
+                    **fixed):
+    """The research entry × exit grid; other Params fields via `fixed`."""
+    base = dict(stop_z=5.0, time_stop_bars=360, budget_usd=250_000,
+                cost_per_entry=HALF_TICK_COST, cost_per_exit=HALF_TICK_COST)
+    base.update(fixed)
+    return [Params(entry_z=float(e), exit_z=float(x), **base)
+            for e in entries for x in exits]
+
+
+def _attach(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Pool workers (fork, spawn and forkserver alike) inherit the creator's
+    # resource tracker, where the block is already registered: registering
+    # again is a no-op, and unregistering would drop the creator's entry.
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedArrays:
+    """
+    Named NumPy arrays published in shared memory. `spec` is the picklable
+    handle (block name, shape, dtype per array) that workers attach with.
+    The creating process must call close() (or use it as a context manager).
+    """
+    def __init__(self, **arrays):
+        self._blocks = []
+        self.spec = {}
+        try:
+            for key, arr in arrays.items():
+                arr = np.asarray(arr)
+                if arr.dtype == object:
+                    raise TypeError(f"{key}: object arrays can't be shared; "
+                                    "convert timestamps to datetime64 first")
+                shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                self._blocks.append(shm)
+                np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+                self.spec[key] = (shm.name, arr.shape, arr.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def attach(spec):
+        """Map a spec back to arrays. Returns (arrays, blocks); keep blocks alive."""
+        blocks, arrays = [], {}
+        for key, (name, shape, dtype) in spec.items():
+            shm = _attach(name)
+            blocks.append(shm)
+            arrays[key] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+        return arrays, blocks
+
+    def arrays(self):
+        return {key: np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+                for shm, (key, (_, shape, dtype)) in zip(self._blocks, self.spec.items())}
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def evaluate(arrays, params, backend="numba"):
+    """
+    Backtest one Params on the arrays and return its metrics summary
+    (sharpe, max_dd, turnover, pnl, daily stats); no pnl/pos arrays are kept.
+    """
+    bt = PairBacktester(*(arrays[f] for f in FIELDS), params)
+    bt.backend = backend
+    return bt.run_metrics() if backend == "numba" else bt.run(metrics=True)["metrics"]
+
+
+# ---- worker side ------------------------------------------------------------
+_WORKER = {}
+
+def _init_worker(spec, backend):
+    _WORKER["arrays"], _WORKER["blocks"] = SharedArrays.attach(spec)
+    _WORKER["backend"] = backend
+
+def _evaluate_shared(params):
+    return evaluate(_WORKER["arrays"], params, _WORKER["backend"])
+
+
+def parallel_sweep(shared: SharedArrays, grid, workers=None, backend="numba",
+                   chunksize=None):
+    """
+    Evaluate every Params in `grid` on the shared arrays (keys a, b, beta,
+    alpha, z, ts). Returns one metrics dict per point (sharpe, max_dd,
+    turnover, pnl, daily stats) in grid order. workers=1 runs inline without a pool.
+    """
+    grid = list(grid)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(grid) <= 1:
+        arrays = shared.arrays()
+        return [evaluate(arrays, p, backend) for p in grid]
+    chunksize = chunksize or max(1, len(grid) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(shared.spec, backend)) as pool:
+        return list(pool.map(_evaluate_shared, grid, chunksize=chunksize))
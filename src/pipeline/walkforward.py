@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Walk-forward optimization of the entry/exit Params.
+
+Signals (Kalman β/α, spread, z) are computed once for the full history by
+pipeline.signals and shared with the workers through SharedArrays; each
+fold is just a pair of index ranges into those arrays. Per fold the whole
+grid is run on the train window in one PairGridBacktester pass, the best
+train Sharpe is picked, and that Params is evaluated on the following test
+window. Folds run in parallel.
+
+    python src/pipeline/walkforward.py --train-months 24 --test-months 1 [--anchored]
+"""
+import argparse, os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+from backtest.engine import PairGridBacktester
+from pipeline.sweep import SharedArrays, evaluate, entry_exit_grid, FIELDS
+
+
+@dataclass
+class Fold:
+    train_start: np.datetime64
+    test_start: np.datetime64
+    test_end: np.datetime64
+    train: tuple                       # (lo, hi) indices into the full arrays
+    test: tuple
+
+
+def make_folds(ts, train_months=24, test_months=1, step_months=None, anchored=False,
+               start=None, end=None):
+    """
+    Month-aligned folds over sorted timestamps `ts`. Rolling windows keep a
+    fixed train length; anchored ones grow from the first month.
+    """
+    step = np.timedelta64(step_months or test_months, "M")
+    first = np.datetime64(start or ts[0], "M")
+    last  = np.datetime64(end or ts[-1], "M") + np.timedelta64(1, "M")
+    idx = lambda m: int(np.searchsorted(ts, m.astype(ts.dtype), side="left"))
+    folds = []
+    test_start = first + np.timedelta64(train_months, "M")
+    while test_start < last:
+        test_end = min(test_start + np.timedelta64(test_months, "M"), last)
+        train_start = first if anchored else test_start - np.timedelta64(train_months, "M")
+        fold = Fold(train_start, test_start, test_end,
+                    (idx(train_start), idx(test_start)), (idx(test_start), idx(test_end)))
+        if fold.train[1] > fold.train[0] + 1 and fold.test[1] > fold.test[0] + 1:
+            folds.append(fold)
+        test_start += step
+    return folds
+
+
+def _window(arrays, lo, hi):
+    return {k: v[lo:hi] for k, v in arrays.items()}
+
+
+def run_fold(arrays, fold: Fold, grid):
+    """Optimize on fold.train (one grid pass), evaluate the winner on fold.test."""
+    tr = _window(arrays, *fold.train)
+    rows = PairGridBacktester.from_params(*(tr[f] for f in FIELDS), grid).run_metrics()
+    scores = np.array([m["sharpe"] for m in rows])
+    best = int(np.argmax(scores))
+    res = evaluate(_window(arrays, *fold.test), grid[best])
+    return dict(train_start=str(fold.train_start), test_start=str(fold.test_start),
+                test_end=str(fold.test_end), params=grid[best],
+                train_sharpe=rows[best]["sharpe"], **{f"test_{k}": v for k, v in res.items()})
+
+
+# ---- worker side ------------------------------------------------------------
+_WORKER = {}
+
+def _init_worker(spec):
+    _WORKER["arrays"], _WORKER["blocks"] = SharedArrays.attach(spec)
+
+def _run_fold_shared(args):
+    return run_fold(_WORKER["arrays"], *args)
+
+
+def walk_forward(bars, folds, grid, workers=None):
+    """Run every fold on `bars` (Bars with ZN/ZF/beta/alpha/z); one row per fold."""
+    cols = dict(zip(FIELDS, [*(bars[c] for c in ["ZN", "ZF", "beta", "alpha", "z"]), bars.ts]))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [run_fold(cols, f, grid) for f in folds]
+    with SharedArrays(**cols) as shm, \
+         ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(shm.spec,)) as pool:
+        return list(pool.map(_run_fold_shared, [(f, grid) for f in folds]))
+
+
+if __name__ == "__main__":
+    from pipeline.signals import signal_bars
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--train-months", type=int, default=24)
+    ap.add_argument("--test-months", type=int, default=1)
+    ap.add_argument("--step-months", type=int, default=None)
+    ap.add_argument("--anchored", action="store_true")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    bars  = signal_bars()
+    folds = make_folds(bars.ts, args.train_months, args.test_months,
+                       args.step_months, args.anchored)
+    rows  = walk_forward(bars, folds, entry_exit_grid(), args.workers)
+    for r in rows:
+        p = r["params"]
+        print(f"{r['test_start'][:7]}  e={p.entry_z:.2f} x={p.exit_z:.2f}  "
+              f"train S {r['train_sharpe']:5.2f} | test S {r['test_sharpe']:5.2f}  "
+              f"PnL ${r['test_pnl']:,.0f}  trades {r['test_turnover']}")
+    print(f"OOS PnL ${sum(r['test_pnl'] for r in rows):,.0f} over {len(rows)} folds")
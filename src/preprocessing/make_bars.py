@@ -1,63 +1,154 @@
 #!/usr/bin/env python
 """
-Stream-merge ZN + ZF minute bars into ONE parquet without OOM.
-Works with Polars ≥ 0.20.x
+Merge ZN + ZF minute bars from the raw Databento files into a Parquet
+dataset partitioned by year/month, without OOM:
+
+    data/processed/ZNZF_1m/year=2018/month=01/ZNZF_2018.parquet
+
+• each raw file is scanned lazily and collected with the streaming engine;
+  up to --workers files are built at once (Polars releases the GIL)
+• forward fill carries across files/partitions, not just within a year
+• _manifest.json records what was built, so a rerun only processes raw
+  files that are new or changed (use --rebuild to start over)
+Needs Polars ≥ 1.25.2 (first release whose collect() accepts engine="streaming")
+
+    python src/preprocessing/make_bars.py [--workers 4] [--rebuild]
+    python src/preprocessing/make_bars.py --roots ZT,ZF,ZN,TN,ZB,UB   # → data/processed/ZTZFZNTNZBUB_1m
 """
 
-import glob, pathlib, pyarrow.parquet as pq, polars as pl
+import argparse, glob, json, os, pathlib, shutil
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+import polars as pl
+
+RAW_GLOB = "data/raw/databento/ZNZF_*.parquet"
+OUT_DIR  = pathlib.Path("data/processed/ZNZF_1m")
+ROOTS    = ["ZN", "ZF"]
+MANIFEST = "_manifest.json"
+
+
+def scan_wide(src, roots=ROOTS) -> pl.LazyFrame:
+    """Lazy wide frame (ts_event, *roots) of last close per minute, forward-filled within src."""
+    lf = (pl.scan_parquet(src)
+            .select(["ts_event", "symbol", "close"])
+            # root symbol: "ZN", "ZF", "UB", "UD", ...
+            .with_columns(pl.col("symbol").str.slice(0, 2).alias("root"))
+            .filter(pl.col("root").is_in(roots)))
+    return (lf.group_by("ts_event")
+              .agg([pl.col("close").filter(pl.col("root") == r).last().alias(r)
+                    for r in roots])
+              .sort("ts_event")
+              .with_columns([pl.col(r).fill_null(strategy="forward") for r in roots])
+              .select(["ts_event", *roots]))
+
+
+def build_file(src, roots=ROOTS) -> pl.DataFrame:
+    return scan_wide(src, roots).collect(engine="streaming")
+
 
-RAW_FILES = sorted(glob.glob("data/raw/databento/ZNZF_*.parquet"))
-print("Raw files:", RAW_FILES)
+def _file_key(src):
+    st = os.stat(src)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
 
-out_path = pathlib.Path("data/processed/ZNZF_1m.parquet")
-out_path.parent.mkdir(parents=True, exist_ok=True)
 
-writer = None
-COL_ORDER = ["ts_event", "ZN", "ZF"]        # fixed order for all chunks
+def _write_partitions(wide, out_dir, stem):
+    """Write one file's rows into year=/month= partitions; returns relative paths."""
+    parts = []
+    wide = wide.with_columns(pl.col("ts_event").dt.year().alias("_y"),
+                             pl.col("ts_event").dt.month().alias("_m"))
+    for (y, m), chunk in wide.partition_by(["_y", "_m"], as_dict=True,
+                                           maintain_order=True).items():
+        rel = pathlib.Path(f"year={y}") / f"month={m:02d}" / f"{stem}.parquet"
+        (out_dir / rel).parent.mkdir(parents=True, exist_ok=True)
+        chunk.drop(["_y", "_m"]).write_parquet(out_dir / rel, compression="zstd")
+        parts.append(str(rel))
+    return parts
 
-for src in RAW_FILES:
-    print("→", src)
-    df = pl.read_parquet(src)
 
-    # root symbol: "ZN", "ZF", "UB", "UD", ...
-    df = df.with_columns(
-            pl.col("symbol")
-              .str.slice(0, 2)
-              .alias("root")
-        )
+def make_bars(raw_files, out_dir=OUT_DIR, roots=ROOTS, workers=4, rebuild=False):
+    """
+    Build (or bring up to date) the partitioned dataset from `raw_files`.
+    Returns the names of the raw files that were (re)processed.
+    """
+    out_dir = pathlib.Path(out_dir)
+    raw_files = sorted(raw_files)
+    man_path = out_dir / MANIFEST
+    manifest = json.loads(man_path.read_text()) if man_path.exists() else {}
+    if rebuild or manifest.get("roots") != list(roots):
+        shutil.rmtree(out_dir, ignore_errors=True)
+        manifest = {}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    done = manifest.setdefault("files", {})
+    manifest["roots"] = list(roots)
 
-    # keep only ZN & ZF rows
-    df = df.filter(pl.col("root").is_in(["ZN", "ZF"]))
+    def is_current(src):
+        entry = done.get(pathlib.Path(src).name)
+        return entry is not None and all(entry[k] == v for k, v in _file_key(src).items())
 
-    wide = (df
-            .select(["ts_event", "root", "close"])
-            .group_by(["ts_event", "root"])
-            .agg(pl.col("close").last())
-            .pivot(values="close", index="ts_event", on="root")
-            .sort("ts_event"))
+    stale = [src for src in raw_files if not is_current(src)]
+    todo  = iter(stale)
+    built = []
+    carry = {r: None for r in roots}
 
-    # ensure both columns exist and fixed order
-    for col in ["ZN", "ZF"]:
-        if col not in wide.columns:
-            wide = wide.with_columns(pl.lit(None).alias(col))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # keep at most `workers` built files in flight/in memory
+        inflight = deque((s, pool.submit(build_file, s, roots))
+                         for s in islice(todo, max(1, workers)))
+        for src in raw_files:
+            name  = pathlib.Path(src).name
+            entry = done.get(name)
+            if inflight and inflight[0][0] == src:
+                wide = inflight.popleft()[1].result()
+                nxt = next(todo, None)
+                if nxt is not None:
+                    inflight.append((nxt, pool.submit(build_file, nxt, roots)))
+            elif entry["carry_in"] != carry:
+                wide = build_file(src, roots)     # unchanged file, but what precedes it changed
+            else:
+                carry = entry["last"]
+                continue
 
-    wide = (wide
-            .with_columns([
-                pl.col("ZN").fill_null(strategy="forward"),
-                pl.col("ZF").fill_null(strategy="forward")
-            ])
-            .select(COL_ORDER))
+            print("→", src)
+            # only leading nulls survive the in-file forward fill; seed them from the previous file
+            wide = wide.with_columns([pl.col(r).fill_null(carry[r])
+                                      for r in roots if carry[r] is not None])
+            for rel in (entry or {}).get("parts", []):
+                (out_dir / rel).unlink(missing_ok=True)
+            last = {r: (wide[r].drop_nulls()[-1] if wide[r].null_count() < len(wide)
+                        else carry[r]) for r in roots}
+            done[name] = dict(_file_key(src), carry_in=carry, last=last, rows=len(wide),
+                              parts=_write_partitions(wide, out_dir, pathlib.Path(src).stem))
+            carry = last
+            built.append(name)
+            man_path.write_text(json.dumps(manifest, indent=1))   # progress survives a crash
 
-    tbl = wide.to_arrow()
+    for name in set(done) - {pathlib.Path(s).name for s in raw_files}:
+        for rel in done.pop(name)["parts"]:
+            (out_dir / rel).unlink(missing_ok=True)
+    man_path.write_text(json.dumps(manifest, indent=1))
+    return built
 
-    if writer is None:
-        writer = pq.ParquetWriter(out_path, tbl.schema,
-                                  compression="zstd", use_dictionary=True)
 
-    writer.write_table(tbl)
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--raw", default=RAW_GLOB)
+    ap.add_argument("--out", default=None,
+                    help="default data/processed/<ROOTS>_1m, e.g. ZNZF_1m")
+    ap.add_argument("--roots", default=",".join(ROOTS),
+                    help="comma-separated contract roots to keep, e.g. ZT,ZF,ZN,TN,ZB,UB")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--rebuild", action="store_true")
+    args = ap.parse_args()
 
-if writer:
-    writer.close()
-    print("✅  wrote", out_path, f"({out_path.stat().st_size/1e6:,.1f} MB)")
-else:
-    print("⚠️  no data written – check RAW_FILES paths.")
+    roots = [r.strip() for r in args.roots.split(",") if r.strip()]
+    args.out = args.out or str(OUT_DIR.parent / f"{''.join(roots)}_1m")
+    raw = sorted(glob.glob(args.raw))
+    print("Raw files:", raw)
+    built = make_bars(raw, args.out, roots, workers=args.workers, rebuild=args.rebuild)
+    if not raw:
+        print("⚠️  no data written – check RAW_FILES paths.")
+    else:
+        size = sum(p.stat().st_size for p in pathlib.Path(args.out).rglob("*.parquet"))
+        print(f"✅  {len(built)} file(s) rebuilt, {len(raw) - len(built)} up to date → "
+              f"{args.out} ({size/1e6:,.1f} MB)")
@@ -1,2 +1,66 @@
-# Entry/exit & risk rules
-# ...implementation placeholder...
+"""
+Entry/exit & risk rules of the ZN/ZF mean-reversion trade, one bar at a time.
+
+MeanRevertRules is the per-bar state machine behind PairBacktester: given
+the close of bar i and z[i] it decides what to hold for the next bar
+(exit on |z| < exit_z, |z| > stop_z, a NaN z or after time_stop_bars;
+enter when flat and |z| > entry_z, sized to budget_usd). Feeding it a
+series bar by bar reproduces PairBacktester.run() positions exactly, so the
+live runtime and the backtest share one definition of the strategy.
+"""
+import math
+from backtest.engine import Params, POINT_VALUE_USD, MAX_POINT_JUMP
+
+
+def size(pa, pb, beta, sign, budget_usd):
+    """Integer (qA, qB) for one spread unit scaled to budget_usd (PairBacktester._size)."""
+    notional = pa*POINT_VALUE_USD + abs(beta)*pb*POINT_VALUE_USD
+    scale = max(1.0, budget_usd / notional)
+    side = -beta * sign
+    qA = sign * max(1, int(round(scale)))
+    qB = (1 if side > 0 else -1 if side < 0 else 0) * max(1, int(round(abs(beta) * scale)))
+    return qA, qB
+
+
+class MeanRevertRules:
+    """
+    on_bar(pa, pb, beta, z) → (target_qA, target_qB, exited, entered), or
+    None when the position is unchanged. Prices are bar closes; the first
+    bar only primes the previous close.
+    """
+    __slots__ = ("p", "in_pos", "qA", "qB", "age", "_pa", "_pb")
+
+    def __init__(self, params: Params = Params()):
+        self.p = params
+        self.in_pos = False
+        self.qA = self.qB = 0
+        self.age = 0
+        self._pa = self._pb = None
+
+    def on_bar(self, pa, pb, beta, z):
+        p = self.p
+        if self._pa is None:
+            self._pa, self._pb = pa, pb
+            return None
+        # holding period counts bars whose PnL was booked (bad-tick bars are skipped)
+        if (self.in_pos and abs(pa - self._pa) <= MAX_POINT_JUMP
+                and abs(pb - self._pb) <= MAX_POINT_JUMP):
+            self.age += 1
+        self._pa, self._pb = pa, pb
+
+        exited = entered = False
+        nan_z = math.isnan(z)
+        if self.in_pos and (nan_z or abs(z) < p.exit_z or abs(z) > p.stop_z
+                            or self.age >= p.time_stop_bars):
+            self.in_pos = False
+            self.qA = self.qB = 0
+            self.age = 0
+            exited = True
+        if not self.in_pos and not nan_z and abs(z) > p.entry_z:
+            sgn = -1 if z > 0 else 1                 # short spread when z>0, long when z<0
+            self.qA, self.qB = size(pa, pb, beta, sgn, p.budget_usd)
+            self.in_pos = True
+            entered = True
+        if exited or entered:
+            return self.qA, self.qB, exited, entered
+        return None
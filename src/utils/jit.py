@@ -0,0 +1,22 @@
+"""
+Optional Numba JIT.
+
+`njit` compiles with numba when it is installed and otherwise hands the
+plain-Python function back unchanged, so every kernel still runs (slowly)
+in a bare environment.
+"""
+try:
+    from numba import njit as _numba_njit
+    HAVE_NUMBA = True
+except ImportError:                               # pragma: no cover
+    _numba_njit = None
+    HAVE_NUMBA = False
+
+
+def njit(*args, **kwargs):
+    """Drop-in for `numba.njit`, usable bare (`@njit`) or with options."""
+    if HAVE_NUMBA:
+        return _numba_njit(*args, **kwargs)
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+    return lambda fn: fn
@@ -0,0 +1,200 @@
+"""
+Stage-level instrumentation for pipeline scripts.
+
+    timer = StageTimer(profile=True)
+    with timer.stage("load") as st:
+        bars = load_bars(...)
+        st.rows = len(bars)
+    timer.write(run_dir / "timings.json")
+
+Each stage records wall time, CPU time (this process plus any child
+processes reaped during the stage, e.g. a ProcessPoolExecutor shut down
+inside it), the peak RSS sampled while it ran, its net RSS change and an
+optional row count. RSS is read from /proc every rss_ms; where /proc is
+missing the RSS fields are None and only the report's process-lifetime
+high-water mark (ru_maxrss) is given.
+Stages nest ("signals/kalman"). With profile=True each top-level stage
+also runs under cProfile and its stats are written next to the report
+(cProfile can't nest, so nested stages get no .prof of their own and show
+up inside their parent's profile); with
+sample_ms > 0 a background thread samples the main thread's stack and the
+report lists each stage's hottest functions. Library code takes an
+optional timer and uses `stage(timer, name)`, which is a no-op for None.
+"""
+import cProfile, collections, contextlib, json, os, pathlib, sys, threading, time
+
+try:
+    import resource                          # POSIX only
+except ImportError:                          # pragma: no cover
+    resource = None
+
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def peak_rss_bytes():
+    """Lifetime peak resident set size of this process, or None if unavailable."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024      # Linux reports KiB
+
+
+def current_rss_bytes():
+    """Resident set size of this process right now (Linux /proc), or None."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def children_cpu_s():
+    """User + system CPU of terminated, waited-for child processes so far."""
+    if resource is None:
+        return 0.0
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.wall_s = self.cpu_s = self.child_cpu_s = 0.0
+        self.peak_rss = self.rss_delta = None
+        self.profile = None
+        self.samples = collections.Counter()
+
+    def as_dict(self, top=10):
+        d = dict(stage=self.name, wall_s=self.wall_s, cpu_s=self.cpu_s,
+                 child_cpu_s=self.child_cpu_s, rows=self.rows,
+                 peak_rss_bytes=self.peak_rss, rss_delta_bytes=self.rss_delta)
+        if self.rows and self.wall_s > 0:
+            d["rows_per_s"] = self.rows / self.wall_s
+        if self.samples:
+            total = sum(self.samples.values())
+            d["hot"] = [dict(frame=f, share=c / total)
+                        for f, c in self.samples.most_common(top)]
+        return d
+
+
+class _Sampler(threading.Thread):
+    """Statistical profiler: every `interval` s, count the main thread's innermost frame."""
+    def __init__(self, timer, interval):
+        super().__init__(daemon=True)
+        self.timer, self.interval = timer, interval
+        self.main_id = threading.main_thread().ident
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.main_id)
+            stages = self.timer._stack
+            if frame is None or not stages:
+                continue
+            code = frame.f_code
+            stages[-1].samples[f"{code.co_filename}:{code.co_name}:{frame.f_lineno}"] += 1
+
+
+class _RssSampler(threading.Thread):
+    """Every `interval` s, fold the current RSS into the peaks of the open stages."""
+    def __init__(self, timer, interval):
+        super().__init__(daemon=True)
+        self.timer, self.interval = timer, interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if self.timer._stack:
+                self.timer._note_rss(current_rss_bytes())
+
+
+class StageTimer:
+    def __init__(self, profile=False, sample_ms=0, rss_ms=10):
+        self.profile = profile
+        self.stages = []
+        self._stack = []
+        self._sampler = None
+        self._rss_sampler = None
+        if sample_ms > 0:
+            self._sampler = _Sampler(self, sample_ms / 1000)
+            self._sampler.start()
+        if rss_ms > 0 and current_rss_bytes() is not None:
+            self._rss_sampler = _RssSampler(self, rss_ms / 1000)
+            self._rss_sampler.start()
+
+    def _note_rss(self, rss):
+        if rss is None:
+            return
+        for st in list(self._stack):
+            if st.peak_rss is None or rss > st.peak_rss:
+                st.peak_rss = rss
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        st = Stage("/".join([s.name for s in self._stack] + [name]))
+        self.stages.append(st)
+        self._stack.append(st)
+        # cProfile can't nest: only the outermost profiled stage collects
+        prof = cProfile.Profile() if self.profile and len(self._stack) == 1 else None
+        rss0 = current_rss_bytes()
+        self._note_rss(rss0)
+        w0, c0, k0 = time.perf_counter(), time.process_time(), children_cpu_s()
+        if prof:
+            prof.enable()
+        try:
+            yield st
+        finally:
+            if prof:
+                prof.disable()
+                st.profile = prof
+            st.wall_s = time.perf_counter() - w0
+            st.child_cpu_s = children_cpu_s() - k0
+            st.cpu_s = time.process_time() - c0 + st.child_cpu_s
+            rss1 = current_rss_bytes()
+            self._note_rss(rss1)
+            if rss0 is not None and rss1 is not None:
+                st.rss_delta = rss1 - rss0
+            self._stack.pop()
+
+    def close(self):
+        for sampler in (self._sampler, self._rss_sampler):
+            if sampler is not None:
+                sampler.stopped.set()
+                sampler.join()
+        self._sampler = self._rss_sampler = None
+
+    def report(self):
+        return dict(created=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    lifetime_peak_rss_bytes=peak_rss_bytes(),
+                    stages=[s.as_dict() for s in self.stages])
+
+    def summary(self):
+        lines = []
+        for s in self.stages:
+            rows = f"{s.rows:>12,} rows" if s.rows is not None else " " * 17
+            rss = f"{s.peak_rss / 2**20:8.0f} MiB peak" if s.peak_rss is not None else ""
+            lines.append(f"{s.name:28s} {s.wall_s:9.3f}s wall {s.cpu_s:9.3f}s cpu {rows} {rss}")
+        return "\n".join(lines)
+
+    def write(self, path):
+        """JSON report at `path`; cProfile stats as <stage>.prof in a sibling profile/ dir."""
+        self.close()
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=1))
+        profiled = [s for s in self.stages if s.profile is not None]
+        if profiled:
+            prof_dir = path.parent / "profile"
+            prof_dir.mkdir(exist_ok=True)
+            for s in profiled:
+                s.profile.dump_stats(prof_dir / f"{s.name.replace('/', '.')}.prof")
+        return path
+
+
+def stage(timer, name):
+    """timer.stage(name), or a do-nothing context when timer is None."""
+    if timer is None:
+        return contextlib.nullcontext(Stage(name))
+    return timer.stage(name)
@@ -0,0 +1,25 @@
+import pathlib, sys
+
+# modules under src/ import each other as top-level packages (indicators.*, backtest.*)
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import subprocess, textwrap
+import pytest
+
+SRC = pathlib.Path(__file__).resolve().parents[1] / "src"
+
+
+@pytest.fixture
+def run_clean():
+    """
+    Run a Python snippet in a fresh interpreter (src/ on the path) and
+    return its stdout; fail if anything reached stderr. Pool workers and the
+    multiprocessing resource tracker report problems there (e.g. KeyError
+    tracebacks for shared memory blocks), which in-process capture misses.
+    """
+    def run(code):
+        proc = subprocess.run([sys.executable, "-c", textwrap.dedent(code)], cwd=SRC,
+                              capture_output=True, text=True, timeout=300)
+        assert proc.returncode == 0 and not proc.stderr.strip(), proc.stderr
+        return proc.stdout
+    return run
@@ -1,2 +1,236 @@
 # Unit tests for backtest engine
-# ...implementation placeholder...
+import numpy as np
+import pytest
+from backtest.engine import PairBacktester, PairGridBacktester, Params
+
+
+def _market(n=3_000, seed=1):
+    rng = np.random.default_rng(seed)
+    b = 110 + np.cumsum(rng.normal(0, 0.02, n))
+    a = 1.3 * b - 20 + rng.normal(0, 0.05, n)
+    a[n // 2] += 2.0                                   # one bad tick
+    beta = 1.3 + rng.normal(0, 0.01, n)
+    alpha = np.full(n, -20.0)
+    z = np.cumsum(rng.normal(0, 0.3, n)) % 6 - 3        # sweeps through every band
+    z[::97] = np.nan
+    ts = np.arange(n).astype("datetime64[m]")
+    return a, b, beta, alpha, z, ts
+
+
+def _grid():
+    return [Params(entry_z=e, exit_z=x, stop_z=s, time_stop_bars=t,
+                   cost_per_entry=11.7, cost_per_exit=11.7)
+            for e in (1.5, 2.0, 2.5) for x in (0.2, 0.5)
+            for s in (2.8, 5.0) for t in (30, 360)]
+
+
+def test_grid_matches_scalar_engine():
+    mkt = _market()
+    grid = _grid()
+    out = PairGridBacktester.from_params(*mkt, grid).run()
+    assert out["pnl"].shape == (len(grid), len(mkt[0]))
+    for g, p in enumerate(grid):
+        ref = PairBacktester(*mkt, p).run()
+        np.testing.assert_array_equal(out["posA"][g], ref["posA"])
+        np.testing.assert_array_equal(out["posB"][g], ref["posB"])
+        np.testing.assert_allclose(out["pnl"][g], ref["pnl"], rtol=1e-12)
+
+
+def test_numba_backend_matches_reference():
+    mkt = _market()
+    for p in _grid()[::3]:
+        ref = PairBacktester(*mkt, p).run()
+        bt = PairBacktester(*mkt, p)
+        bt.backend = "numba"
+        out = bt.run()
+        np.testing.assert_array_equal(out["posA"], ref["posA"])
+        np.testing.assert_array_equal(out["posB"], ref["posB"])
+        np.testing.assert_allclose(out["pnl"], ref["pnl"], rtol=1e-12)
+
+
+def test_parallel_sweep_matches_inline():
+    from pipeline.sweep import SharedArrays, parallel_sweep, evaluate, FIELDS
+    mkt = dict(zip(FIELDS, _market()))
+    grid = _grid()[:6]
+    with SharedArrays(**mkt) as shm:
+        rows = parallel_sweep(shm, grid, workers=2)
+    assert rows == [evaluate(mkt, p) for p in grid]
+
+
+@pytest.mark.parametrize("method", ["fork", "spawn"])
+def test_pooled_sweep_keeps_tracker_quiet(run_clean, method):
+    out = run_clean(f"""
+        import multiprocessing as mp, numpy as np
+        from pipeline.sweep import SharedArrays, parallel_sweep, entry_exit_grid, FIELDS
+        if __name__ == "__main__":
+            mp.set_start_method("{method}", force=True)
+            rng = np.random.default_rng(0)
+            n = 2_000
+            b = 110 + np.cumsum(rng.normal(0, 0.02, n))
+            mkt = dict(a=1.3 * b - 20 + rng.normal(0, 0.05, n), b=b, beta=np.full(n, 1.3),
+                       alpha=np.full(n, -20.0), z=rng.normal(0, 2, n),
+                       ts=np.arange(n).astype("datetime64[m]").astype("datetime64[ns]"))
+            with SharedArrays(**mkt) as shm:
+                print(len(parallel_sweep(shm, entry_exit_grid(), workers=2)))
+    """)
+    assert out.split() == ["28"]
+
+
+def test_walk_forward_folds_and_parallel_parity():
+    from dbload.bars import Bars
+    from pipeline.walkforward import make_folds, walk_forward
+    a, b, beta, alpha, z, _ = _market(n=6_000)
+    ts = np.datetime64("2020-01-01") + np.arange(6_000) * np.timedelta64(20, "m")
+    bars = Bars(ts.astype("datetime64[us]"), ZN=a, ZF=b, beta=beta, alpha=alpha, z=z)
+
+    rolling = make_folds(bars.ts, train_months=1, test_months=1)
+    anchored = make_folds(bars.ts, train_months=1, test_months=1, anchored=True)
+    assert [f.test for f in rolling] == [f.test for f in anchored] and len(rolling) == 2
+    assert rolling[1].train[0] == rolling[0].test[0] and anchored[1].train[0] == 0
+
+    grid = _grid()[:4]
+    rows = walk_forward(bars, rolling, grid, workers=2)
+    assert rows == walk_forward(bars, rolling, grid, workers=1)
+    assert all(r["params"] in grid for r in rows)
+
+
+def test_streaming_metrics_match_full_array_metrics():
+    import pandas as pd
+    from backtest.metrics import sharpe, drawdown, turnover
+    mkt = _market()
+    ts = np.datetime64("2024-01-05T13:20") + np.arange(len(mkt[0])) * np.timedelta64(7, "m")
+    mkt = (*mkt[:5], ts)                                  # spans weekends → empty days
+    grid = _grid()
+    by_grid = PairGridBacktester.from_params(*mkt, grid).run_metrics()
+    for p, m_grid in zip(grid, by_grid):
+        bt = PairBacktester(*mkt, p)
+        out = bt.run(metrics=True)
+        pnl = out["pnl"]
+        daily = pd.Series(np.diff(pnl), index=pd.DatetimeIndex(ts[1:])).resample("D").sum()
+        for m in (out["metrics"], bt.run_metrics(), m_grid):
+            np.testing.assert_allclose(m["sharpe"], sharpe(np.diff(pnl)), rtol=1e-8)
+            assert m["max_dd"] == drawdown(pnl)[0]
+            assert m["turnover"] == turnover(out["posA"], out["posB"])
+            assert m["pnl"] == pnl[-1] and m["n_days"] == len(daily)
+            np.testing.assert_allclose([m["daily_min"], m["daily_mean"], m["daily_max"]],
+                                       [daily.min(), daily.mean(), daily.max()], atol=1e-6)
+
+
+def test_daily_sharpe_counts_trading_days_only():
+    import pandas as pd
+    mkt = _market()
+    days = pd.bdate_range("2024-01-01", periods=30)                 # weekdays, no holidays
+    ts = (days.values.repeat(100) + np.tile(np.arange(100) * np.timedelta64(3, "m")
+                                            + np.timedelta64(810, "m"), 30))
+    mkt = (*mkt[:5], ts)
+    for p in _grid()[:4]:
+        out = PairBacktester(*mkt, p).run(metrics=True)
+        daily = pd.Series(np.diff(out["pnl"]), index=pd.DatetimeIndex(ts[1:])).resample("B").sum()
+        assert len(daily) == 30 and out["metrics"]["n_days"] == 40   # calendar stats keep weekends
+        np.testing.assert_allclose(out["metrics"]["daily_sharpe"],
+                                   daily.mean() / daily.std(ddof=0) * np.sqrt(252), rtol=1e-9)
+
+
+def test_trade_ledger_rebuilds_dense_result():
+    mkt = _market()
+    for p in _grid()[::5]:
+        bt = PairBacktester(*mkt, p)
+        bt.backend = "numba"
+        dense = bt.run()
+        led = bt.run_ledger(metrics=True)
+        t = led.trades
+        assert len(t) > 0 and led.nbytes < sum(v.nbytes for v in dense.values())
+        rebuilt = led.to_dense()
+        for k in ("pnl", "posA", "posB"):
+            np.testing.assert_array_equal(rebuilt[k], dense[k])
+        closed = t[t["exit_idx"] >= 0]
+        assert np.all(closed["exit_idx"] >= closed["entry_idx"])
+        np.testing.assert_array_equal(dense["posA"][closed["exit_idx"]], closed["qA"])
+        np.testing.assert_allclose(t["pnl"].sum(), dense["pnl"][-1], rtol=1e-9)
+        assert led.metrics == bt.run_metrics()
+
+
+def test_portfolio_matches_pair_engine_and_numpy_path():
+    from backtest.portfolio import PortfolioBacktester, _portfolio_numpy
+    a, b, beta, alpha, z, ts = _market()
+    zt = 0.5 * b + 47 + np.cumsum(np.random.default_rng(2).normal(0, 0.002, len(b)))
+    prices = np.column_stack([zt, b, a])
+    grid = _grid()
+    params = [grid[0], grid[9], grid[20]]
+    bt = PortfolioBacktester(prices, ["ZT", "ZF", "ZN"],
+                             [("ZN", "ZF"), ("ZN", "ZF"), ("ZF", "ZT")],
+                             np.column_stack([beta, beta, beta / 2]),
+                             np.column_stack([z, z, -z]), ts, params)
+    out = bt.run()
+    for p in range(2):
+        ref = PairBacktester(a, b, beta, alpha, z, ts, params[p]).run()
+        np.testing.assert_array_equal(out["posA"][p], ref["posA"])
+        np.testing.assert_array_equal(out["posB"][p], ref["posB"])
+        np.testing.assert_allclose(out["pnl"][p], ref["pnl"], rtol=1e-12)
+
+    n, P = len(a), 3
+    pnl = np.zeros((n, P)); posA = np.zeros((n, P), dtype=np.int64); posB = posA.copy()
+    _portfolio_numpy(*bt._args(), None, *bt._param_arrays(), pnl, posA, posB)
+    np.testing.assert_array_equal(posA.T, out["posA"])
+    np.testing.assert_array_equal(posB.T, out["posB"])
+    np.testing.assert_allclose(pnl.T, out["pnl"], rtol=1e-12, atol=1e-9)
+    assert np.abs(out["posA"][2]).max() > 0           # the ZT leg trades
+
+    m = bt.run_metrics()
+    assert [r["pnl"] for r in m["pairs"]] == [pytest.approx(x) for x in out["pnl"][:, -1]]
+    assert m["portfolio"]["pnl"] == pytest.approx(out["equity"][-1])
+    net = bt.net_positions(out)
+    np.testing.assert_array_equal(net[2], out["posA"][:2].sum(axis=0))
+
+
+def test_portfolio_bad_tick_guard_is_per_contract():
+    from backtest.portfolio import PortfolioBacktester, CONTRACTS, _portfolio_numpy
+    n = 6
+    zt = np.full(n, 102.0); zt[3:] += 0.5              # 0.5 pt: a bad print for ZT
+    ub = np.full(n, 120.0); ub[3:] += 1.5              # 1.5 pt: a real move for UB
+    flat = np.full(n, 110.0)
+    z = np.array([0.0, 3.0, 2.5, 2.5, 2.5, 2.5])        # enter at bar 1, hold
+    bt = PortfolioBacktester(np.column_stack([zt, flat, ub, flat]), ["ZT", "ZF", "UB", "ZB"],
+                             [("ZT", "ZF"), ("UB", "ZB")], np.ones((n, 2)),
+                             np.column_stack([z, z]), None, Params(entry_z=2.0))
+    out = bt.run()
+    assert out["pnl"][0, -1] == 0.0                      # ZT jump skipped
+    qA = out["posA"][1, 3]
+    assert qA != 0 and out["pnl"][1, -1] == qA * 1.5 * CONTRACTS["UB"].point_value
+
+    pnl = np.zeros((n, 2)); posA = np.zeros((n, 2), dtype=np.int64); posB = posA.copy()
+    _portfolio_numpy(*bt._args(), None, *bt._param_arrays(), pnl, posA, posB)
+    np.testing.assert_array_equal(pnl.T, out["pnl"])
+
+
+def test_portfolio_zn_zf_row_matches_pair_engine_through_big_zf_moves():
+    from backtest.portfolio import PortfolioBacktester
+    a, b, beta, alpha, z, ts = _market()
+    b = b.copy()
+    b[500::400] += 0.75                                 # ZF minute moves in (0.5, 1.0]
+    b[700::400] -= 0.9
+    params = _grid()[0]
+    ref = PairBacktester(a, b, beta, alpha, z, ts, params).run()
+    out = PortfolioBacktester(np.column_stack([b, a]), ["ZF", "ZN"], [("ZN", "ZF")],
+                              beta[:, None], z[:, None], ts, params).run()
+    assert np.abs(ref["posA"][499::400]).max() > 0      # held through some of the jumps
+    np.testing.assert_array_equal(out["posA"][0], ref["posA"])
+    np.testing.assert_array_equal(out["posB"][0], ref["posB"])
+    np.testing.assert_allclose(out["pnl"][0], ref["pnl"], rtol=1e-12)
+
+
+def test_curve_signals_match_per_pair_passes():
+    from dbload.bars import Bars
+    from indicators.kalman import kalman_beta_alpha_fast
+    from indicators.ewstats import ew_z
+    from pipeline.signals import curve_signals
+    a, b, *_ = _market(n=2_000)
+    zt = 0.5 * b + 47 + np.cumsum(np.random.default_rng(2).normal(0, 0.002, len(b)))
+    bars = Bars(np.arange(2_000).astype("datetime64[m]"), ZT=zt, ZF=b, ZN=a)
+    pairs = [("ZN", "ZF"), ("ZF", "ZT")]
+    beta, z = curve_signals(bars, pairs, k=0.02)
+    assert beta.shape == z.shape == (2_000, 2)
+    for p, (ra, rb) in enumerate(pairs):
+        bp, ap = kalman_beta_alpha_fast(bars[ra], bars[rb])
+        np.testing.assert_array_equal(beta[:, p], bp)
+        np.testing.assert_array_equal(z[:, p], ew_z(bars[ra] - bp * bars[rb] - ap, k=0.02))
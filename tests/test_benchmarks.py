@@ -0,0 +1,44 @@
+# Tests for the benchmark regression gate (one tiny timing run)
+import importlib.util, json, pathlib
+import pytest
+
+BENCH = pathlib.Path(__file__).resolve().parents[1] / "benchmarks"
+
+
+@pytest.fixture(scope="module")
+def suite():
+    spec = importlib.util.spec_from_file_location("bench_suite", BENCH / "suite.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _results(rows):
+    return dict(machine={}, created="", results=[dict(case=c, n=n, seconds=n / bps, bars_per_s=bps,
+                                                      peak_bytes=0) for c, n, bps in rows])
+
+
+def test_compare_flags_synthetic_regression(suite, tmp_path, capsys):
+    base = _results([("ew_z", 10**4, 2e8), ("ew_z", 10**5, 2e8), ("kalman_fast", 10**4, 6e7)])
+    cur = _results([("ew_z", 10**4, 1.9e8), ("ew_z", 10**5, 1.2e8),      # 0.6x → regressed
+                    ("kalman_fast", 10**4, 6.5e7), ("sweep", 10**4, 1e6)])   # no baseline row
+    bad = suite.compare(base, cur, threshold=0.2)
+    assert [(r["case"], r["n"]) for r in bad] == [("ew_z", 10**5)]
+    assert bad[0]["ratio"] == pytest.approx(0.6)
+
+    (tmp_path / "base.json").write_text(json.dumps(base))
+    (tmp_path / "cur.json").write_text(json.dumps(cur))
+    paths = [str(tmp_path / "base.json"), str(tmp_path / "cur.json")]
+    assert suite.main(["compare", *paths]) == 1
+    assert "1 regression(s)" in capsys.readouterr().out
+    assert suite.main(["compare", *paths, "--threshold", "0.5"]) == 0
+
+
+def test_run_saves_a_baseline_and_gates_against_it(suite, tmp_path, capsys):
+    # the CI gate's two steps, on one tiny case
+    base = tmp_path / "base.json"
+    args = ["run", "--cases", "ew_z", "--sizes", "1e3", "--repeat", "1"]
+    assert suite.main([*args, "--save", str(base)]) == 0
+    assert [(r["case"], r["n"]) for r in json.loads(base.read_text())["results"]] == [("ew_z", 1000)]
+    assert suite.main([*args, "--compare", str(base), "--threshold", "1"]) == 0
+    assert "no regressions" in capsys.readouterr().out
@@ -0,0 +1,68 @@
+# Tests for the memory-mapped bar cache
+import numpy as np
+from dbload.bars import Bars
+from dbload.cache import BarCache, cache_key
+
+
+def _bars(n):
+    return Bars(np.arange(n).astype("datetime64[m]"), ZN=np.linspace(110, 111, n),
+                z=np.random.default_rng(0).normal(size=n))
+
+
+def test_roundtrip_key_and_lru_eviction(tmp_path):
+    src = tmp_path / "part.parquet"
+    src.write_bytes(b"x")
+    k1 = cache_key([src], q=1e-4)
+    assert k1 == cache_key([src], q=1e-4) != cache_key([src], q=1e-3)
+
+    cache = BarCache(tmp_path / "cache", max_bytes=2.5 * 8 * 1_000 * 3)
+    built = []
+    got = cache.get_or_build(k1, lambda: built.append(1) or _bars(1_000))
+    assert isinstance(got["z"], np.memmap)
+    np.testing.assert_array_equal(got["z"], _bars(1_000)["z"])
+    cache.get_or_build(k1, lambda: built.append(1) or _bars(1_000))
+    assert built == [1]                                   # second call is a hit
+
+    cache.put("k2", _bars(1_000)); cache.get(k1)          # k1 is now the most recent
+    cache.put("k3", _bars(1_000))                         # over the cap → k2 goes
+    assert cache.get("k2") is None and cache.get(k1) is not None
+
+
+def test_put_after_losing_the_publish_race(tmp_path):
+    cache = BarCache(tmp_path / "cache")
+    winner = _bars(500)
+    cache.put("k", winner)                                # another process published first
+    mine = Bars(winner.ts, ZN=winner["ZN"] + 1, z=winner["z"])
+    got = cache.put("k", mine)
+    assert isinstance(got["ZN"], np.memmap)
+    np.testing.assert_array_equal(got["ZN"], winner["ZN"])
+
+    # the winner's entry is being evicted: its _used marker is already gone
+    (tmp_path / "cache" / "k" / "_used").unlink()
+    got = cache.put("k", mine)
+    assert got is mine
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["k"]   # no tmp left
+
+
+def test_get_races_eviction(tmp_path, monkeypatch):
+    import dbload.cache as mod
+    cache = BarCache(tmp_path / "cache")
+    cache.put("k", _bars(100))
+    touch = mod._touch
+
+    def evicted_after_check(path):                        # another process evicts "k" here
+        BarCache(tmp_path / "cache", max_bytes=0).evict()
+        touch(path)
+    monkeypatch.setattr(mod, "_touch", evicted_after_check)
+    assert cache.get("k") is None
+    assert list((tmp_path / "cache").iterdir()) == []     # tombstone removed too
+
+    monkeypatch.setattr(mod, "_touch", touch)
+    cache.put("k", _bars(100))
+    load = np.load
+
+    def evicted_mid_load(path, **kw):                     # files vanish after the glob
+        BarCache(tmp_path / "cache", max_bytes=0).evict()
+        return load(path, **kw)
+    monkeypatch.setattr(np, "load", evicted_mid_load)
+    assert cache.get("k") is None
@@ -0,0 +1,33 @@
+# Unit tests for EW z-score
+import numpy as np
+from indicators.ewstats import ew_z
+
+
+def _ew_z_reference(spread, k):
+    z = np.empty(len(spread)); mu = 0.0; var = 1.0
+    for i, x in enumerate(spread):
+        mu  = (1 - k) * mu + k * x
+        var = (1 - k) * var + k * (x - mu) ** 2
+        z[i] = (x - mu) / np.sqrt(var + 1e-9)
+    return z
+
+
+def test_matches_reference_and_multi_k_rows():
+    x = np.cumsum(np.random.default_rng(0).normal(size=5_000)) * 0.01
+    np.testing.assert_allclose(ew_z(x, 0.01), _ew_z_reference(x, 0.01), rtol=1e-12)
+    ks = np.array([0.002, 0.01, 0.05])
+    zs = ew_z(x, ks)
+    assert zs.shape == (3, 5_000)
+    for row, k in zip(zs, ks):
+        np.testing.assert_array_equal(row, ew_z(x, k))
+
+
+def test_multi_row_spreads_in_one_pass():
+    x = np.cumsum(np.random.default_rng(1).normal(size=(3, 2_000)), axis=1) * 0.01
+    z = ew_z(x, 0.02)
+    assert z.shape == (3, 2_000)
+    for row, xi in zip(z, x):
+        np.testing.assert_array_equal(row, ew_z(xi, 0.02))
+    ks = np.array([0.01, 0.02, 0.05])                  # one decay per row
+    for row, xi, k in zip(ew_z(x, ks), x, ks):
+        np.testing.assert_array_equal(row, ew_z(xi, k))
@@ -0,0 +1,89 @@
+# Tests for the chunked Databento downloader against a local stub client
+import datetime as dt
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+from dbload.fetch import download, month_chunks
+
+
+class _Store:
+    """Stands in for DBNStore: replays recorded rows in to_df(count=...) batches."""
+    def __init__(self, df):
+        self.df = df
+
+    def to_df(self, count=None):
+        for i in range(0, len(self.df), count):
+            yield self.df.iloc[i:i + count]
+
+
+class _Timeseries:
+    def __init__(self, recorded, fail=()):
+        self.recorded, self.fail, self.calls = recorded, set(fail), []
+
+    def get_range(self, dataset, schema, symbols, stype_in, start, end,
+                  adjust_continuous=None, path=None):
+        self.calls.append(start[:7])
+        if start[:7] in self.fail:
+            raise ConnectionError("boom")
+        idx = self.recorded.index
+        return _Store(self.recorded[(idx >= pd.Timestamp(start, tz="UTC"))
+                                    & (idx < pd.Timestamp(end, tz="UTC"))])
+
+
+class _Client:
+    def __init__(self, recorded, end, fail=()):
+        self.timeseries = _Timeseries(recorded, fail)
+        self.metadata = type("M", (), {"get_dataset_range": lambda _, dataset: {"end": end}})()
+
+
+def _recorded():
+    ts = pd.date_range("2023-01-30", "2023-04-02", freq="37min", tz="UTC", name="ts_event")
+    ts = ts[(ts.month != 3)]                                   # a month with no data
+    return pd.DataFrame({"close": np.arange(2 * len(ts), dtype=float)[::2],
+                         "symbol": np.where(np.arange(len(ts)) % 2, "ZNH3", "ZFH3")}, index=ts)
+
+
+def test_month_chunks_clip_both_ends():
+    c = month_chunks("2023-01-15T12:00", "2023-03-02")
+    assert [x.label for x in c] == ["2023-01", "2023-02", "2023-03"]
+    assert c[0].start == dt.datetime(2023, 1, 15, 12) and c[1].start == dt.datetime(2023, 2, 1)
+    assert c[-1].end == dt.datetime(2023, 3, 2)
+
+    # aware inputs are converted to naive UTC
+    aware = month_chunks(dt.datetime(2023, 1, 15, 12, tzinfo=dt.timezone.utc),
+                         "2023-03-02T01:00:00+01:00")
+    assert [(x.label, x.start, x.end) for x in aware] == [(x.label, x.start, x.end) for x in c]
+
+
+def test_download_streams_chunks_and_resumes(tmp_path):
+    rec = _recorded()
+    client = _Client(rec, end="2023-03-31T00:00:00Z", fail={"2023-02"})
+    kw = dict(dataset="GLBX.MDP3", schema="ohlcv-1m", symbols=["ZN.FUT", "ZF.FUT"],
+              adjust="ratio", workers=3, batch=100, log=lambda *_: None)
+    with pytest.raises(RuntimeError, match="2023-02"):
+        download(client, "2023-01-01", "2023-06-01", tmp_path, **kw)
+    assert sorted(p.name for p in tmp_path.glob("*.parquet")) == ["ZNZF_2023-01.parquet"]
+
+    client.timeseries.fail.clear(); client.timeseries.calls.clear()
+    assert download(client, "2023-01-01", "2023-06-01", tmp_path, **kw) == ["2023-02"]
+    assert client.timeseries.calls == ["2023-02"]              # Jan and empty Mar skipped
+    feb = tmp_path / "ZNZF_2023-02.parquet"
+    import pyarrow.parquet as pq
+    assert pq.ParquetFile(feb).num_row_groups > 1             # one per batch
+    got = pl.read_parquet(tmp_path / "ZNZF_*.parquet").sort("ts_event")
+    want = rec[rec.index < pd.Timestamp("2023-03-01", tz="UTC")]
+    assert got["close"].to_list() == want["close"].tolist()
+
+    client.metadata = type("M", (), {"get_dataset_range": lambda _, dataset: {"end": "2023-04-30"}})()
+    client.timeseries.calls.clear()
+    assert download(client, "2023-01-01", "2023-06-01", tmp_path, **kw) == ["2023-03", "2023-04"]
+    assert (tmp_path / "ZNZF_2023-04.parquet").exists()       # partial month refetched as it grew
+
+
+def test_download_accepts_aware_bounds(tmp_path):
+    client = _Client(_recorded(), end="2023-02-28T00:00:00Z")
+    got = download(client, dt.datetime(2023, 1, 1, tzinfo=dt.timezone.utc),
+                   "2023-06-01T00:00:00+00:00", tmp_path, dataset="GLBX.MDP3",
+                   schema="ohlcv-1m", symbols=["ZN.FUT"], workers=1, log=lambda *_: None)
+    assert got == ["2023-01", "2023-02"]                     # clipped at the naive dataset end
@@ -0,0 +1,49 @@
+# Tests for the paper-trading runtime
+import asyncio
+import numpy as np
+from backtest.engine import PairBacktester, Params
+from indicators.stream import SignalState
+from live.feeds import ArrayFeed, SocketFeed, serve_bars
+from live.runtime import paper_trader
+
+
+def _market(n=5_000, seed=4):
+    rng = np.random.default_rng(seed)
+    b = 110 + np.cumsum(rng.normal(0, 0.02, n))
+    a = 1.3 * b - 20 + np.cumsum(rng.normal(0, 0.01, n)) * 0.2 + rng.normal(0, 0.03, n)
+    a[n // 3] += 2.0                                   # bad tick
+    ts = np.datetime64("2024-01-02T14:30", "ns") + np.arange(n) * np.timedelta64(60, "s")
+    return ts, a, b
+
+
+PARAMS = Params(entry_z=1.5, exit_z=0.3, time_stop_bars=60,
+                cost_per_entry=11.7, cost_per_exit=11.7)
+
+
+def test_replay_matches_backtest_bar_for_bar():
+    ts, a, b = _market()
+    beta, alpha, _, z = SignalState().update(a, b)
+    ref = PairBacktester(a, b, beta, alpha, z, ts, PARAMS).run()
+
+    trader = paper_trader(ArrayFeed(ts, a, b), PARAMS, trace=True)
+    rep = asyncio.run(trader.run())
+    tr = np.array(trader.trace)
+    np.testing.assert_array_equal(tr[:, 0], ref["posA"])
+    np.testing.assert_array_equal(tr[:, 1], ref["posB"])
+    np.testing.assert_allclose(tr[:, 2], ref["pnl"], rtol=1e-12, atol=1e-9)
+    assert rep["fills"] > 10 and rep["latency"]["decision"]["n"] == len(a)
+    assert 0 < rep["latency"]["decision"]["p50_us"] <= rep["latency"]["event"]["max_us"]
+
+
+def test_socket_feed_gives_same_result():
+    ts, a, b = _market(n=2_000)
+
+    async def main():
+        server = await serve_bars(ts, a, b)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await paper_trader(SocketFeed(port=port), PARAMS).run()
+
+    got = asyncio.run(main())
+    want = asyncio.run(paper_trader(ArrayFeed(ts, a, b), PARAMS).run())
+    assert (got["bars"], got["fills"], got["equity"]) == (want["bars"], want["fills"], want["equity"])
@@ -0,0 +1,55 @@
+# Tests for the partitioned bar builder
+import os
+from datetime import datetime, timedelta
+import polars as pl
+from preprocessing.make_bars import make_bars
+
+
+def _raw(path, start, n, zn0, skip_zn_head=0):
+    ts = [start + timedelta(minutes=i) for i in range(n)]
+    rows = [(t, "ZFH4", 108.0 + i/128, 1) for i, t in enumerate(ts)]
+    rows += [(t, "ZNH4", zn0 + i/64, 2) for i, t in enumerate(ts) if i >= skip_zn_head]
+    rows += [(t, "UBH4", 120.0, 3) for t in ts]
+    pl.DataFrame(rows, schema=["ts_event", "symbol", "close", "instrument_id"],
+                 orient="row").write_parquet(path)
+
+
+def test_partitions_carry_and_incremental(tmp_path):
+    raw, out = tmp_path / "raw", tmp_path / "out"
+    raw.mkdir()
+    _raw(raw / "ZNZF_2022.parquet", datetime(2022, 12, 31, 23, 58), 3, 110.0)
+    _raw(raw / "ZNZF_2023.parquet", datetime(2023, 1, 2), 4, 111.0, skip_zn_head=2)
+    files = sorted(str(p) for p in raw.iterdir())
+
+    assert make_bars(files, out, workers=2) == ["ZNZF_2022.parquet", "ZNZF_2023.parquet"]
+    df = pl.read_parquet(out / "**/*.parquet").sort("ts_event")
+    assert df.columns == ["ts_event", "ZN", "ZF"] and len(df) == 7
+    assert {p.parent.name for p in out.rglob("*.parquet")} == {"month=12", "month=01"}
+    # first ZN bars of 2023 are missing and get the last 2022 close
+    assert df["ZN"].to_list()[3:6] == [110.0 + 2/64, 110.0 + 2/64, 111.0 + 2/64]
+
+    assert make_bars(files, out) == []                     # nothing new
+    _raw(raw / "ZNZF_2023.parquet", datetime(2023, 1, 2), 5, 111.0)
+    os.utime(raw / "ZNZF_2023.parquet", ns=(1, 1))
+    assert make_bars(files, out) == ["ZNZF_2023.parquet"]
+    assert len(pl.read_parquet(out / "**/*.parquet")) == 8
+
+
+def test_load_bars_session_range_and_split_views(tmp_path):
+    import numpy as np
+    from datetime import time, timezone
+    from dbload.bars import load_bars
+    raw, out = tmp_path / "raw", tmp_path / "out"
+    raw.mkdir()
+    _raw(raw / "ZNZF_2023.parquet", datetime(2023, 1, 31, 20, 28), 6 * 24 * 60, 111.0)
+    make_bars([str(raw / "ZNZF_2023.parquet")], out)
+
+    utc = timezone.utc
+    bars = load_bars(out, start=datetime(2023, 2, 1, tzinfo=utc),
+                     end=datetime(2023, 2, 3, tzinfo=utc))
+    tod = (bars.ts - bars.ts.astype("datetime64[D]")).astype("timedelta64[m]").astype(int)
+    assert len(bars) == 2 * 431 and tod.min() == 13*60 + 20 and tod.max() == 20*60 + 30
+    first, second = bars.split(datetime(2023, 2, 2, tzinfo=utc))
+    assert len(first) == len(second) == 431
+    assert np.shares_memory(second["ZN"], bars["ZN"])
+    assert len(load_bars(out, session=(time(0), time(23, 59)))) == 6 * 24 * 60
@@ -0,0 +1,87 @@
+# Tests for the MBP-10 book-to-bar aggregator (no databento needed)
+import numpy as np
+import pyarrow.parquet as pq
+import datetime as dt
+from dbload.mbp10 import BookBarAggregator, book_features, _root_codes, LEVELS, NS_PER_MIN
+
+
+def _records(ts, bid, ask):
+    fields = [("ts_event", "u8"), ("instrument_id", "u4")]
+    fields += [(f"{s}_{k}_{i:02d}", "i8" if k == "px" else "u4")
+               for i in range(LEVELS) for s in ("bid", "ask") for k in ("px", "sz")]
+    rec = np.zeros(len(ts), dtype=fields)
+    rec["ts_event"] = ts
+    rec["bid_px_00"], rec["ask_px_00"] = np.multiply(bid, 1e9), np.multiply(ask, 1e9)
+    for i in range(LEVELS):
+        rec[f"bid_sz_{i:02d}"], rec[f"ask_sz_{i:02d}"] = 30, 10
+    return rec
+
+
+def test_last_snapshot_per_minute_across_batches(tmp_path):
+    ts = np.array([0, 10, 59, 61, 62, 125], dtype=np.int64) * 10**9
+    bid = 110 + np.arange(6) / 64
+    rec = _records(ts, bid, bid + 1/64)
+    codes = np.array([0, 1, 0, 0, 0, 0])               # one ZF update in minute 0
+
+    agg = BookBarAggregator(tmp_path / "book.parquet")
+    for sl in (slice(0, 4), slice(4, 5), slice(5, 6)):  # minute 1 spans two batches
+        ok, feats = book_features(rec[sl])
+        agg.update(ts[sl], codes[sl], feats)
+    assert agg.close() == 4
+
+    tbl = pq.read_table(tmp_path / "book.parquet")
+    minutes = (tbl.column("ts_event").cast("int64").to_numpy() // NS_PER_MIN).tolist()
+    t = tbl.to_pydict()
+    assert list(zip(minutes, t["root"])) == [(0, "ZF"), (0, "ZN"), (1, "ZN"), (2, "ZN")]
+    assert t["n_updates"] == [1, 2, 2, 1]
+    assert t["bid_px"] == [bid[1], bid[2], bid[4], bid[5]]
+    # microprice leans to the ask when bid size dominates; imbalance (30-10)/(30+10) on all levels
+    assert t["microprice"][1] == bid[2] + 0.75 / 64 and t["imbalance"][1] == 0.5
+    np.testing.assert_allclose(t["spread"], 1/64)
+
+
+def test_output_sorted_on_bar_time_across_row_groups(tmp_path):
+    # ZF's minute 0 stays open while ZN completes minutes 0-2 in tiny row groups
+    ts = np.array([0, 1, 61, 62, 121, 122, 181], dtype=np.int64) * 10**9
+    bid = 110 + np.arange(7) / 64
+    rec = _records(ts, bid, bid + 1/64)
+    codes = np.array([1, 0, 0, 0, 0, 0, 1])
+    agg = BookBarAggregator(tmp_path / "book.parquet", row_group=1)
+    for sl in (slice(0, 3), slice(3, 5), slice(5, 7)):
+        ok, feats = book_features(rec[sl])
+        agg.update(ts[sl], codes[sl], feats)
+    assert agg.close() == 5
+    t = pq.read_table(tmp_path / "book.parquet").to_pydict()
+    minutes = [x.timestamp() // 60 for x in t["ts_event"]]
+    assert list(zip(minutes, t["root"])) == [(0, "ZF"), (0, "ZN"), (1, "ZN"), (2, "ZN"), (3, "ZF")]
+    assert [p.name for p in tmp_path.iterdir()] == ["book.parquet"]
+
+
+def test_minute_revisited_out_of_order_is_merged(tmp_path):
+    # ts_recv order: ZN's ts_event steps 5 → 4 → 5 across the boundary (two expiries)
+    ts = np.array([300, 299, 301, 302, 360], dtype=np.int64) * 10**9
+    bid = 110 + np.arange(5) / 64
+    rec = _records(ts, bid, bid + 1/64)
+    agg = BookBarAggregator(tmp_path / "book.parquet", row_group=1)
+    for sl in (slice(0, 2), slice(2, 5)):
+        ok, feats = book_features(rec[sl])
+        agg.update(ts[sl], np.zeros(len(ts[sl]), dtype=np.int64), feats)
+    assert agg.close() == 3
+    t = pq.read_table(tmp_path / "book.parquet").to_pydict()
+    assert [x.timestamp() // 60 for x in t["ts_event"]] == [4, 5, 6]
+    assert t["n_updates"] == [1, 3, 1]
+    assert t["bid_px"] == [bid[1], bid[3], bid[4]]
+
+
+class _Imap:
+    SYMBOLS = {(1, 0): "ZNH3", (2, 0): "ZFH3", (3, 0): "ZNH3-ZNM3", (1, 1): "ZNM3", (4, 0): None}
+
+    def resolve(self, iid, day):
+        return self.SYMBOLS[(iid, (day - dt.date(1970, 1, 1)).days)]
+
+
+def test_root_codes_map_outrights_per_day():
+    iids = np.array([1, 2, 3, 1, 4, 2, 1], dtype=np.uint32)
+    days = np.array([0, 0, 0, 1, 0, 0, 0])
+    np.testing.assert_array_equal(_root_codes(iids, days, _Imap(), ["ZN", "ZF"]),
+                                  [0, 1, -1, 0, -1, 1, 0])
@@ -0,0 +1,43 @@
+# Tests for the stage timer
+import json
+from utils.profiling import StageTimer, stage
+
+
+def test_nested_stages_report_and_profiles(tmp_path):
+    timer = StageTimer(profile=True, sample_ms=1)
+    with timer.stage("outer") as st:
+        with stage(timer, "inner") as inner:
+            sum(range(200_000))
+            inner.rows = 200_000
+        st.rows = 1
+    with stage(None, "ignored") as st:                # no timer: no-op
+        st.rows = 5
+
+    path = timer.write(tmp_path / "timings.json")
+    rep = json.loads(path.read_text())
+    names = [s["stage"] for s in rep["stages"]]
+    assert names == ["outer", "outer/inner"]
+    outer, inner = rep["stages"]
+    assert outer["wall_s"] >= inner["wall_s"] > 0 and inner["rows_per_s"] > 0
+    assert outer["peak_rss_bytes"] > 0
+    assert [p.name for p in (tmp_path / "profile").iterdir()] == ["outer.prof"]
+
+
+def test_stage_rss_is_sampled_per_stage_and_cpu_counts_children():
+    import subprocess, sys, time
+    import numpy as np
+    timer = StageTimer(rss_ms=1)
+    with timer.stage("big"):
+        block = np.ones(12_500_000)                   # ~100 MB, freed before the stage ends
+        time.sleep(0.05)
+        del block
+    with timer.stage("small"):
+        time.sleep(0.02)
+    with timer.stage("child"):
+        subprocess.run([sys.executable, "-c", "sum(range(20_000_000))"], check=True)
+    timer.close()
+    big, small, child = (s.as_dict() for s in timer.stages)
+    assert big["peak_rss_bytes"] - small["peak_rss_bytes"] > 80 * 2**20
+    assert abs(big["rss_delta_bytes"]) < 20 * 2**20
+    assert child["child_cpu_s"] > 0.1 and child["cpu_s"] >= child["child_cpu_s"]
+    assert big["child_cpu_s"] == 0.0
@@ -0,0 +1,92 @@
+# Unit tests for the data-snooping tests
+import pathlib
+import numpy as np
+from backtest.engine import PairGridBacktester
+from backtest.significance import (grid_equity, bar_sharpe, equity_sharpe, reality_check,
+                                   deflated_sharpe, signal_shift_test, significance_report)
+from pipeline.sweep import entry_exit_grid
+
+
+def _arrays(n=4_000, seed=3):
+    rng = np.random.default_rng(seed)
+    b = 110 + np.cumsum(rng.normal(0, 0.02, n))
+    a = 1.3 * b - 20 + rng.normal(0, 0.05, n)
+    z = np.cumsum(rng.normal(0, 0.3, n)) % 6 - 3
+    ts = np.datetime64("2020-01-01", "ns") + np.arange(n) * np.timedelta64(1, "m")
+    return dict(a=a, b=b, beta=np.full(n, 1.3), alpha=np.full(n, -20.0), z=z, ts=ts)
+
+
+def test_grid_equity_matches_engine_metrics():
+    arrays, grid = _arrays(), entry_exit_grid()
+    bt = PairGridBacktester.from_params(*arrays.values(), grid)
+    eq = grid_equity(arrays, grid)
+    np.testing.assert_array_equal(eq, bt.run()["pnl"])
+    expect = [m["sharpe"] for m in bt.run_metrics()]
+    np.testing.assert_allclose(bar_sharpe(np.diff(eq, axis=1)), expect, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(equity_sharpe(eq), expect, rtol=1e-9, atol=1e-9)
+
+
+def _equity(returns):
+    return np.concatenate([np.zeros((len(returns), 1)), np.cumsum(returns, axis=1)], axis=1)
+
+
+def test_reality_check_separates_edge_from_noise():
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 1, (20, 5_000))
+    rc = reality_check(_equity(noise), n_boot=2_000, block=50)
+    assert rc["null"].shape == (2_000,) and rc["p_value"] > 0.05
+    assert rc == {**reality_check(_equity(noise), n_boot=2_000, block=50), "null": rc["null"]}
+
+    edge = noise.copy()
+    edge[7] += 0.15
+    for statistic in ("sharpe", "mean"):
+        rc = reality_check(_equity(edge), n_boot=2_000, block=50, statistic=statistic)
+        assert rc["best"] == 7 and rc["p_value"] < 0.01
+
+
+def test_reality_check_matches_explicit_circular_resampling():
+    r = np.random.default_rng(4).normal(0.01, 1, (3, 1_003))
+    m, block, n_boot = r.shape[1], 40, 50
+    rc = reality_check(_equity(r), n_boot=n_boot, block=block, seed=9)
+    starts = np.random.default_rng(9).integers(0, m, size=(n_boot, m // block))
+    obs = bar_sharpe(r)
+    for b in range(n_boot):
+        idx = ((starts[b][:, None] + np.arange(block)) % m).ravel()   # wrapped blocks
+        assert np.isclose(rc["null"][b], (bar_sharpe(r[:, idx]) - obs).max(), atol=1e-9)
+
+
+def test_deflated_sharpe_penalizes_more_trials():
+    r = np.random.default_rng(1).normal(0.1, 1, 2_000)
+    single = deflated_sharpe(r, [0.1])
+    assert single["sr0"] == 0.0 and single["dsr"] > 0.95
+    trials = np.random.default_rng(2).normal(0, 0.03, 100)
+    many = deflated_sharpe(r, trials, n_trials=1_000)
+    assert many["sr0"] > deflated_sharpe(r, trials)["sr0"] > 0
+    assert many["dsr"] < single["dsr"]
+    assert np.isclose(many["p_value"], 1 - many["dsr"])
+
+
+def test_signal_shift_parallel_parity_and_report(run_clean):
+    arrays, grid = _arrays(), entry_exit_grid()
+    inline = signal_shift_test(arrays, grid, n_shifts=12, min_shift=100, workers=1)
+    # pooled run in a fresh interpreter: any worker or resource-tracker noise fails it
+    pooled = run_clean(f"""
+        import sys
+        sys.path.insert(0, {str(pathlib.Path(__file__).parent)!r})
+        from test_significance import _arrays
+        from backtest.significance import signal_shift_test
+        from pipeline.sweep import entry_exit_grid
+        if __name__ == "__main__":
+            res = signal_shift_test(_arrays(), entry_exit_grid(), n_shifts=12,
+                                    min_shift=100, workers=2)
+            print(res["p_value"], *map(repr, res["null"].tolist()))
+    """).split()
+    assert float(pooled[0]) == inline["p_value"]
+    np.testing.assert_array_equal([float(x) for x in pooled[1:]], inline["null"])
+    assert np.isclose(inline["stat"], equity_sharpe(grid_equity(arrays, grid)).max())
+
+    eq = grid_equity(arrays, grid)
+    rep = significance_report(arrays, grid, n_boot=200, n_shifts=0)
+    assert rep == significance_report(arrays, grid, n_boot=200, n_shifts=0, equity=eq)
+    assert grid[rep["best"]] == rep["params"] and np.isclose(rep["sharpe"], inline["stat"])
+    assert 0 < rep["rc_p"] <= 1 and 0 <= rep["dsr_p"] <= 1 and "shift_p" not in rep
@@ -0,0 +1,44 @@
+# Tests for plot downsampling
+import numpy as np
+from backtest.downsample import minmax_indices, lttb_indices
+
+
+def _series(n=200_000, seed=3):
+    ts = np.datetime64("2020-01-01", "ns") + np.arange(n) * np.timedelta64(60, "s")
+    y = np.cumsum(np.random.default_rng(seed).normal(0, 1, n))
+    y[12_345] += 500.0                                  # one-bar spike
+    return ts, y
+
+
+def test_minmax_keeps_extremes_and_endpoints():
+    ts, y = _series()
+    idx = minmax_indices(ts, y, buckets=500)
+    assert len(idx) <= 4 * 500 and np.all(np.diff(idx) > 0)
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert 12_345 in idx and y.argmin() in idx
+    # every bucket's min/max survives
+    x = ts.view(np.int64).astype(float)
+    b = np.minimum(((x - x[0]) / (x[-1] - x[0]) * 500).astype(int), 499)
+    for k in (0, 123, 499):
+        sel = np.flatnonzero(b == k)
+        assert y[sel].max() == y[idx[b[idx] == k]].max()
+        assert y[sel].min() == y[idx[b[idx] == k]].min()
+
+
+def test_lttb_size_and_endpoints():
+    ts, y = _series()
+    idx = lttb_indices(ts, y, 1_000)
+    assert len(idx) == 1_000 and np.all(np.diff(idx) > 0)
+    assert idx[0] == 0 and idx[-1] == len(y) - 1 and 12_345 in idx
+    assert len(lttb_indices(ts[:50], y[:50], 1_000)) == 50
+
+
+def test_downsampled_png_matches_full_render(tmp_path):
+    from matplotlib.image import imread
+    from backtest.viz_mpl import save_equity_bars_png
+    ts, y = _series()
+    save_equity_bars_png(ts, y, tmp_path / "full.png", downsample_method=None)
+    save_equity_bars_png(ts, y, tmp_path / "fast.png")
+    full, fast = imread(tmp_path / "full.png"), imread(tmp_path / "fast.png")
+    assert full.shape == fast.shape
+    assert (np.abs(full - fast).max(axis=2) > 0.1).mean() < 0.01